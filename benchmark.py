@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark Harness for PDF Document Structure Extractor
+Times each pipeline stage on a synthetic corpus and compares against a baseline
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from create_benchmark_pdfs import create_benchmark_corpus
+from pdf_processor import EXTRACTION_BACKENDS, PDFProcessor, extract_page_range
+
+STAGES = ["extract_text_blocks", "extract_title", "detect_headings", "format_output"]
+
+def time_stages(processor, pdf_path, repeat):
+    """
+    Run the pipeline stages on one PDF and return the median time of each
+
+    Args:
+        processor: PDFProcessor instance
+        pdf_path: Path to PDF file
+        repeat: Number of timed runs per stage
+
+    Returns:
+        dict: Stage timings in seconds plus span and heading counts
+    """
+    timings = {stage: [] for stage in STAGES}
+
+    for _ in range(repeat):
+        doc = fitz.open(str(pdf_path))
+        try:
+            page_count = min(len(doc), processor.max_pages)
+
+            start = time.perf_counter()
+            text_blocks = processor._extract_text_blocks(doc, page_count)
+            timings["extract_text_blocks"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            title = processor.title_extractor.extract_title(doc, text_blocks)
+            timings["extract_title"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            headings = processor.heading_detector.detect_headings(text_blocks)
+            timings["detect_headings"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = processor.output_formatter.format_output(title, headings)
+            timings["format_output"].append(time.perf_counter() - start)
+        finally:
+            doc.close()
+
+    entry = {stage: statistics.median(values) for stage, values in timings.items()}
+    entry["total"] = sum(entry[stage] for stage in STAGES)
+    entry["pages"] = page_count
+    entry["spans"] = len(text_blocks)
+    entry["headings"] = len(result["outline"])
+    return entry
+
+def run_benchmarks(pdf_files, repeat):
+    """Time every PDF and return the machine-readable results document"""
+    processor = PDFProcessor()
+    results = {}
+
+    for pdf_path in pdf_files:
+        entry = time_stages(processor, pdf_path, repeat)
+        results[pdf_path.stem] = entry
+        print(f"{pdf_path.stem:20s} {entry['spans']:7d} spans  " +
+              "  ".join(f"{stage}={entry[stage] * 1000:8.2f}ms" for stage in STAGES))
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": fitz.VersionBind,
+        },
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare_backends(pdf_path, repeat):
+    """
+    Time every extraction backend on each page and check they return the same spans
+    
+    Each page is extracted once per backend untimed before the timed runs,
+    and the backend order rotates between runs.
+    
+    Args:
+        pdf_path: Path to PDF file
+        repeat: Number of timed runs per page and backend
+        
+    Returns:
+        list: Per-page entries with the median seconds of each backend
+    """
+    pages = []
+    doc = fitz.open(str(pdf_path))
+    try:
+        for page_num in range(min(len(doc), PDFProcessor.max_pages)):
+            entry = {"page": page_num + 1}
+            
+            # Untimed warm-up with every backend, so none absorbs the cold-page cost
+            spans = {
+                backend: list(extract_page_range(doc, page_num, page_num + 1, backend))
+                for backend in EXTRACTION_BACKENDS
+            }
+            
+            # Rotate which backend runs first on each repeat to cancel order effects
+            samples = {backend: [] for backend in EXTRACTION_BACKENDS}
+            for run in range(repeat):
+                shift = run % len(EXTRACTION_BACKENDS)
+                for backend in EXTRACTION_BACKENDS[shift:] + EXTRACTION_BACKENDS[:shift]:
+                    start = time.perf_counter()
+                    extract_page_range(doc, page_num, page_num + 1, backend)
+                    samples[backend].append(time.perf_counter() - start)
+            
+            for backend in EXTRACTION_BACKENDS:
+                entry[backend] = statistics.median(samples[backend])
+            
+            reference = spans[EXTRACTION_BACKENDS[0]]
+            entry["spans"] = len(reference)
+            entry["identical"] = all(rows == reference for rows in spans.values())
+            pages.append(entry)
+    finally:
+        doc.close()
+    
+    return pages
+
+def run_backend_comparison(pdf_files, repeat):
+    """Compare extraction backends page by page and print per-document totals"""
+    results = {}
+    
+    for pdf_path in pdf_files:
+        pages = compare_backends(pdf_path, repeat)
+        results[pdf_path.stem] = pages
+        
+        totals = {backend: sum(page[backend] for page in pages) for backend in EXTRACTION_BACKENDS}
+        differing = [page["page"] for page in pages if not page["identical"]]
+        print(f"{pdf_path.stem:20s} " +
+              "  ".join(f"{backend}={totals[backend] * 1000:8.2f}ms" for backend in EXTRACTION_BACKENDS) +
+              ("  spans identical" if not differing else f"  spans differ on pages {differing}"))
+    
+    return results
+
+def compare_to_baseline(current, baseline, tolerance):
+    """
+    Compare stage timings against a baseline
+
+    Args:
+        current: Results document from run_benchmarks
+        baseline: Previously stored results document
+        tolerance: Allowed slowdown as a fraction (0.2 = 20%)
+
+    Returns:
+        list: Regression descriptions, empty if none
+    """
+    regressions = []
+
+    for name, entry in current["results"].items():
+        base_entry = baseline["results"].get(name)
+        if base_entry is None:
+            continue
+
+        for stage in STAGES + ["total"]:
+            base_time = base_entry.get(stage)
+            if not base_time:
+                continue
+            ratio = entry[stage] / base_time
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{name}.{stage}: {entry[stage] * 1000:.2f}ms vs "
+                    f"{base_time * 1000:.2f}ms baseline ({ratio:.2f}x)"
+                )
+
+    return regressions
+
+def main():
+    """Generate the corpus if needed, run the benchmarks and check the baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction stages")
+    parser.add_argument("--corpus", default="benchmark_corpus", help="Directory of benchmark PDFs")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write results")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown versus baseline as a fraction (default: 0.2)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (default: 3)")
+    parser.add_argument("--backends", action="store_true",
+                        help="Also compare extraction backends page by page")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    # Read the baseline up front; writing results over it would compare the run with itself
+    baseline = None
+    if args.baseline:
+        if Path(args.baseline).resolve() == Path(args.output).resolve():
+            parser.error("--output must differ from --baseline")
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    corpus_dir = Path(args.corpus)
+    pdf_files = sorted(corpus_dir.glob("*.pdf"))
+    if not pdf_files:
+        pdf_files = create_benchmark_corpus(corpus_dir)
+
+    current = run_benchmarks(pdf_files, args.repeat)
+    
+    if args.backends:
+        print("\nExtraction backends, summed per-page medians:")
+        current["backends"] = run_backend_comparison(pdf_files, args.repeat)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions over {args.tolerance:.0%} tolerance:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+
+        print(f"\n✅ No regressions over {args.tolerance:.0%} tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Create Synthetic Benchmark PDFs
+Generates parameterized PDF documents locally with PyMuPDF for benchmarking
+"""
+
+import random
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+# Base-14 font pairs (regular, bold) available without embedding
+FONT_FAMILIES = [
+    ("helv", "hebo"),
+    ("tiro", "tibo"),
+    ("cour", "cobo"),
+    ("heit", "hebi"),
+    ("tiit", "tibi"),
+    ("coit", "cobi"),
+]
+
+BODY_WORDS = [
+    "analysis", "data", "model", "system", "process", "results", "method",
+    "value", "report", "design", "review", "section", "table", "figure",
+]
+
+ROMAN_NUMERALS = [
+    "I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X",
+    "XI", "XII", "XIII", "XIV", "XV", "XVI", "XVII", "XVIII", "XIX", "XX",
+]
+
+# Standard corpus used by benchmark.py
+BENCHMARK_CASES = [
+    {"name": "short_report", "pages": 5, "spans_per_page": 40, "font_variety": 2, "numbering": "decimal"},
+    {"name": "medium_manual", "pages": 25, "spans_per_page": 60, "font_variety": 3, "numbering": "decimal"},
+    {"name": "long_report", "pages": 50, "spans_per_page": 60, "font_variety": 2, "numbering": "roman"},
+    {"name": "dense_tables", "pages": 50, "spans_per_page": 300, "font_variety": 4, "numbering": "alpha"},
+    {"name": "unnumbered", "pages": 30, "spans_per_page": 80, "font_variety": 6, "numbering": "none"},
+    # Table-of-contents style cover page with thousands of tiny spans
+    {"name": "dense_cover", "pages": 5, "spans_per_page": 60, "font_variety": 2, "numbering": "decimal",
+     "first_page_spans": 3000},
+    # Scanned-report style: a photo-sized image on every page
+    {"name": "image_heavy", "pages": 20, "spans_per_page": 40, "font_variety": 2, "numbering": "decimal",
+     "images_per_page": 1},
+    # Tagged-manual style: headings are also in the bookmark tree
+    {"name": "bookmarked_manual", "pages": 50, "spans_per_page": 120, "font_variety": 3, "numbering": "decimal",
+     "bookmarks": True},
+]
+
+def heading_label(numbering, counters, level):
+    """Build the numbering prefix for a heading at the given level (1-3)"""
+    if numbering == "decimal":
+        return ".".join(str(c) for c in counters[:level]) + (". " if level == 1 else " ")
+    if numbering == "roman" and level == 1:
+        return f"{ROMAN_NUMERALS[(counters[0] - 1) % len(ROMAN_NUMERALS)]}. "
+    if numbering == "alpha" and level == 1:
+        return f"{chr(ord('A') + (counters[0] - 1) % 26)}. "
+    return ""
+
+def generate_pdf(pdf_path, pages, spans_per_page, font_variety=2, numbering="decimal", seed=0,
+                 first_page_spans=None, images_per_page=0, bookmarks=False):
+    """
+    Write a synthetic PDF with a title, multi-level headings and body text
+
+    Args:
+        pdf_path: Output file path
+        pages: Number of pages
+        spans_per_page: Approximate text spans per page
+        font_variety: Number of font families used for body text (1-6)
+        numbering: Heading numbering style: decimal, roman, alpha or none
+        seed: Random seed, so the same parameters always give the same file
+        first_page_spans: If set, fill the first page with this many tiny spans instead
+        images_per_page: Distinct noise images drawn behind the text of each page
+        bookmarks: Also add every heading to the document's bookmark tree
+    """
+    rng = random.Random(seed)
+    families = FONT_FAMILIES[:max(1, min(font_variety, len(FONT_FAMILIES)))]
+    heading_regular, heading_bold = families[0]
+
+    # Columns per line grow with density so the page can hold the spans
+    columns = max(1, spans_per_page // 60)
+    line_step = max(8.0, min(14.0, 720.0 * columns / spans_per_page))
+    body_size = max(6.0, min(10.0, line_step - 3))
+    column_width = 470 / columns
+
+    counters = [0, 0, 0]
+    toc = []
+    doc = fitz.open()
+
+    for page_num in range(pages):
+        page = doc.new_page()
+        y = 60
+        
+        for _ in range(images_per_page):
+            add_noise_image(page, rng)
+
+        if page_num == 0:
+            page.insert_text((120, y), "Synthetic Benchmark Document", fontname=heading_bold, fontsize=22)
+            y += 40
+
+            if first_page_spans:
+                add_dense_cover(page, rng, families, first_page_spans, y)
+                page.insert_text((300, 810), "1", fontname=heading_regular, fontsize=9)
+                continue
+
+        spans = 0
+        while spans < spans_per_page and y < 780:
+            roll = rng.random()
+
+            if roll < 0.04:
+                level = 1 if roll < 0.015 else (2 if roll < 0.03 else 3)
+                counters[level - 1] += 1
+                for deeper in range(level, 3):
+                    counters[deeper] = 0
+                for shallower in range(level - 1):
+                    counters[shallower] = max(counters[shallower], 1)
+
+                text = heading_label(numbering, counters, level) + f"Heading Topic {counters[level - 1]}"
+                size = {1: 16, 2: 13, 3: 11.5}[level]
+                y += 8
+                page.insert_text((72, y), text, fontname=heading_bold, fontsize=size)
+                # Bookmark levels may only descend one step at a time
+                toc.append([min(level, toc[-1][0] + 1 if toc else 1), text, page_num + 1])
+                y += size + 8
+                spans += 1
+                continue
+
+            for column in range(columns):
+                regular, bold = rng.choice(families)
+                words = " ".join(rng.choice(BODY_WORDS) for _ in range(rng.randint(2, 9)))
+                fontname = bold if rng.random() < 0.03 else regular
+                page.insert_text((60 + column * column_width, y), words, fontname=fontname, fontsize=body_size)
+                spans += 1
+            y += line_step
+
+        page.insert_text((300, 810), str(page_num + 1), fontname=heading_regular, fontsize=9)
+
+    if bookmarks:
+        doc.set_toc(toc)
+    doc.save(str(pdf_path))
+    doc.close()
+
+def add_dense_cover(page, rng, families, span_count, top):
+    """Fill a page with a grid of tiny spans, like a table of contents or legal boilerplate"""
+    columns = 10
+    rows = -(-span_count // columns)
+    line_step = (790 - top) / rows
+    font_size = max(1.0, min(5.0, line_step - 0.5))
+
+    for i in range(span_count):
+        row, column = divmod(i, columns)
+        regular, _ = rng.choice(families)
+        text = f"{rng.choice(BODY_WORDS)} {i}"
+        page.insert_text((30 + column * 55, top + row * line_step), text, fontname=regular, fontsize=font_size)
+
+def add_noise_image(page, rng, width=640, height=480):
+    """Draw a random-noise JPEG over the page; noise keeps it from compressing away"""
+    pixmap = fitz.Pixmap(fitz.csRGB, width, height, rng.randbytes(width * height * 3), False)
+    page.insert_image(page.rect, stream=pixmap.tobytes("jpg"), overlay=False)
+
+def create_benchmark_corpus(corpus_dir="benchmark_corpus"):
+    """Generate every standard benchmark case into corpus_dir"""
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for case in BENCHMARK_CASES:
+        pdf_path = corpus_dir / f"{case['name']}.pdf"
+        generate_pdf(
+            pdf_path,
+            pages=case["pages"],
+            spans_per_page=case["spans_per_page"],
+            font_variety=case["font_variety"],
+            numbering=case["numbering"],
+            first_page_spans=case.get("first_page_spans"),
+            images_per_page=case.get("images_per_page", 0),
+            bookmarks=case.get("bookmarks", False),
+        )
+        paths.append(pdf_path)
+
+    print(f"✅ Created {len(paths)} benchmark PDFs in {corpus_dir}/")
+    return paths
+
+if __name__ == "__main__":
+    create_benchmark_corpus()
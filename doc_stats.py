@@ -0,0 +1,139 @@
+"""
+Document Statistics - Incremental accumulation of document-wide span statistics
+"""
+
+import math
+import operator
+from collections import Counter
+from fractions import Fraction
+from itertools import groupby
+
+from span_table import SpanTable
+
+
+# Text kept for language detection: the first spans, up to about this much
+LANGUAGE_SAMPLE_SPANS = 50
+LANGUAGE_SAMPLE_CHARS = 1000
+
+
+class DocumentStatistics:
+    """Accumulates font statistics one block or page at a time"""
+
+    def __init__(self):
+        self.count = 0
+        self.size_counts = Counter()
+        self.font_counts = Counter()
+        self.style_counts = Counter()  # (font, size, is_bold) -> span count
+
+        # Per-page text coverage for text_density
+        self.page_text_area = Counter()
+        self.page_extents = {}  # page -> (max x1, max y1)
+
+        self.language_sample = []
+        self._sample_chars = 0
+
+    def add(self, block):
+        """Add a single text block"""
+        self.count += 1
+        self.size_counts[block["size"]] += 1
+        self.font_counts[block["font"]] += 1
+        self.style_counts[(block["font"], block["size"], block["is_bold"])] += 1
+        area = (block["x1"] - block["x0"]) * (block["y1"] - block["y0"])
+        self._add_page_geometry(block["page"], area, block["x1"], block["y1"])
+        self._add_sample_text(block["text"])
+
+    def add_blocks(self, text_blocks):
+        """Add every block of a page or document"""
+        if isinstance(text_blocks, SpanTable):
+            # Read the columns directly instead of building row views
+            fonts = [text_blocks.fonts[font_id] for font_id in text_blocks.font_ids]
+            bold = [bool(flags & 2**4) for flags in text_blocks.flags]
+            self.count += len(text_blocks)
+            self.size_counts.update(text_blocks.size)
+            self.font_counts.update(fonts)
+            self.style_counts.update(zip(fonts, text_blocks.size, bold))
+
+            # Geometry per run of same-page spans, with the arithmetic done by map
+            start = 0
+            for page, run in groupby(text_blocks.page):
+                end = start + len(list(run))
+                x0, y0 = text_blocks.x0[start:end], text_blocks.y0[start:end]
+                x1, y1 = text_blocks.x1[start:end], text_blocks.y1[start:end]
+                area = sum(map(operator.mul, map(operator.sub, x1, x0), map(operator.sub, y1, y0)))
+                self._add_page_geometry(page, area, max(x1), max(y1))
+                start = end
+
+            for text in text_blocks.text:
+                if not self._add_sample_text(text):
+                    break
+            return
+
+        for block in text_blocks:
+            self.add(block)
+
+    def mean(self):
+        """Exact mean of font sizes, rounded once like statistics.mean"""
+        total = sum(Fraction(size) * count for size, count in self.size_counts.items())
+        return float(total / self.count)
+
+    def median(self):
+        """Median font size"""
+        middle = self.count // 2
+        if self.count % 2:
+            return self._nth_size(middle)
+        return (self._nth_size(middle - 1) + self._nth_size(middle)) / 2
+
+    def stdev(self):
+        """Sample standard deviation of font sizes"""
+        if self.count < 2:
+            return 0
+        mean = sum(Fraction(size) * count for size, count in self.size_counts.items()) / self.count
+        squares = sum((Fraction(size) - mean) ** 2 * count for size, count in self.size_counts.items())
+        return math.sqrt(squares / (self.count - 1))
+
+    def mode(self):
+        """Most common font size, usually the body text size"""
+        return self.size_counts.most_common(1)[0][0]
+
+    def max_size(self):
+        """Largest font size"""
+        return max(self.size_counts)
+
+    def common_fonts(self, limit=3):
+        """Most frequently used font names"""
+        return [font for font, count in self.font_counts.most_common(limit)]
+
+    def text_density(self, page_num):
+        """Share of a page's text extent covered by span boxes (0 if it has no text)"""
+        extent = self.page_extents.get(page_num)
+        if extent is None:
+            return 0
+        page_area = extent[0] * extent[1]
+        if page_area == 0:
+            return 0
+        return self.page_text_area[page_num] / page_area
+
+    def _add_page_geometry(self, page, area, max_x1, max_y1):
+        """Add span area to a page and widen its text extent"""
+        self.page_text_area[page] += area
+        extent = self.page_extents.get(page)
+        if extent is not None:
+            max_x1, max_y1 = max(max_x1, extent[0]), max(max_y1, extent[1])
+        self.page_extents[page] = (max_x1, max_y1)
+
+    def _add_sample_text(self, text):
+        """Keep text for language detection; False once the sample is full"""
+        if len(self.language_sample) >= LANGUAGE_SAMPLE_SPANS or self._sample_chars > LANGUAGE_SAMPLE_CHARS:
+            return False
+        self.language_sample.append(text)
+        self._sample_chars += len(text) + 1
+        return True
+
+    def _nth_size(self, n):
+        """Return the n-th smallest font size (0-based)"""
+        seen = 0
+        for size in sorted(self.size_counts):
+            seen += self.size_counts[size]
+            if n < seen:
+                return size
+        raise IndexError("size index out of range")
@@ -2,44 +2,45 @@
 Heading Detector - Advanced heuristics for detecting document headings
 """
 
+import bisect
+import heapq
 import logging
-import re
 import statistics
-from collections import defaultdict, Counter
+from collections import defaultdict
+from doc_stats import DocumentStatistics
+from instrumentation import NullInstrumentation
+from page_index import PageIndex
+from patterns import match_exclusion, match_heading, numbering_depth
 
 logger = logging.getLogger(__name__)
 
 class HeadingDetector:
     """Detects headings using multiple heuristic approaches"""
     
-    def __init__(self):
-        self.heading_patterns = [
-            # Numbered patterns
-            r'^\d+\.?\s+',  # 1. or 1 
-            r'^\d+\.\d+\.?\s+',  # 1.1. or 1.1
-            r'^\d+\.\d+\.\d+\.?\s+',  # 1.1.1. or 1.1.1
-            r'^[IVXLCDM]+\.?\s+',  # Roman numerals
-            r'^[A-Z]\.?\s+',  # A. or A
-            r'^[a-z]\)?\s+',  # a) or a
-            # Bullet patterns
-            r'^[•▪▫◦‣⁃]\s+',
-            r'^[-*]\s+',
-        ]
-        
-        self.exclude_patterns = [
-            r'^\d+$',  # Page numbers
-            r'^page\s+\d+',
-            r'^fig\w*\s+\d+',
-            r'^table\s+\d+',
-            r'^appendix\s*[a-z]?$',
-        ]
+    def __init__(self, instrumentation=None, max_level=3, prefilter=True):
+        # Cheap first stage: body-sized spans that are not bold, pattern-matched
+        # or title case skip the spacing, standalone and consistency heuristics
+        self.prefilter = prefilter
+        self.prefilter_min_size_ratio = 1.1
+        
+        # Stage timings and counts, a no-op unless enabled by the processor
+        self.instrumentation = instrumentation or NullInstrumentation()
+        
+        # Limit to reasonable number of headings
+        self.max_headings = 50
+        
+        # Deepest heading level emitted, H3 by default and up to H6
+        if not 1 <= max_level <= 6:
+            raise ValueError(f"max_level must be between 1 and 6, got {max_level}")
+        self.max_level = max_level
     
-    def detect_headings(self, text_blocks):
+    def detect_headings(self, text_blocks, doc_stats=None):
         """
         Detect headings from text blocks using multiple heuristics
         
         Args:
             text_blocks: List of text blocks with formatting information
+            doc_stats: DocumentStatistics already accumulated over text_blocks
             
         Returns:
             List of heading dictionaries with level, text, and page
@@ -47,82 +48,190 @@ class HeadingDetector:
         if not text_blocks:
             return []
         
+        metrics = self.instrumentation
+        
         # Calculate document statistics
-        stats = self._calculate_statistics(text_blocks)
+        with metrics.stage("statistics"):
+            stats = self._calculate_statistics(text_blocks, doc_stats)
         
         # Score all potential headings
-        candidates = self._score_heading_candidates(text_blocks, stats)
+        with metrics.stage("score_candidates"):
+            candidates = self._score_heading_candidates(text_blocks, stats)
+        metrics.count("candidates", len(candidates))
         
         # Filter and rank candidates
-        headings = self._select_headings(candidates, stats)
+        with metrics.stage("select_headings"):
+            headings = self._select_headings(candidates, stats)
         
         # Assign hierarchy levels
-        leveled_headings = self._assign_levels(headings)
+        with metrics.stage("assign_levels"):
+            leveled_headings = self._assign_levels(headings)
+        
+        logger.info(f"Detected {len(leveled_headings)} headings")
+        return leveled_headings
+    
+    def detect_headings_streaming(self, pages, doc_stats):
+        """
+        Detect headings one page at a time using precomputed document statistics
+        
+        Args:
+            pages: Iterable of per-page text blocks, in page order
+            doc_stats: DocumentStatistics accumulated over the whole document
+            
+        Returns:
+            List of heading dictionaries with level, text, and page
+        """
+        if not doc_stats.count:
+            return []
+        
+        metrics = self.instrumentation
+        with metrics.stage("statistics"):
+            stats = self._statistics_from(doc_stats)
+        
+        # Selection keeps at most max_headings of the highest-scored candidates,
+        # so only those and a running score total are held across pages
+        top_candidates = []
+        score_total = 0
+        candidate_count = 0
+        
+        # Spacing and standalone checks only look at the current page
+        for page_blocks in pages:
+            with metrics.stage("score_candidates"):
+                page_stats = dict(stats, page_index=PageIndex(page_blocks))
+                page_candidates = self._score_heading_candidates(page_blocks, page_stats)
+            
+            for candidate in page_candidates:
+                score_total += candidate["score"]
+                candidate_count += 1
+                
+                # Ties keep document order, matching the stable sort in _select_headings
+                entry = (candidate["score"], -candidate_count, candidate)
+                if len(top_candidates) < self.max_headings:
+                    heapq.heappush(top_candidates, entry)
+                elif entry > top_candidates[0]:
+                    heapq.heapreplace(top_candidates, entry)
+                else:
+                    continue
+                
+                # Copy the span so the page's blocks can be released
+                candidate["original_block"] = dict(candidate["original_block"])
+        
+        metrics.count("candidates", candidate_count)
+        if not candidate_count:
+            return []
+        
+        with metrics.stage("select_headings"):
+            top_candidates.sort(reverse=True)
+            ranked = [candidate for _, _, candidate in top_candidates]
+            headings = self._select_headings(ranked, stats, score_total / candidate_count)
+        
+        with metrics.stage("assign_levels"):
+            leveled_headings = self._assign_levels(headings)
         
         logger.info(f"Detected {len(leveled_headings)} headings")
         return leveled_headings
     
-    def _calculate_statistics(self, text_blocks):
+    def _calculate_statistics(self, text_blocks, doc_stats=None):
         """Calculate document-wide statistics for scoring"""
+        if doc_stats is None:
+            doc_stats = DocumentStatistics()
+            doc_stats.add_blocks(text_blocks)
+        stats = self._statistics_from(doc_stats)
+        
+        # Spatial index for neighbour lookups during scoring
+        stats["page_index"] = PageIndex(text_blocks)
+        
+        return stats
+    
+    def _statistics_from(self, doc_stats):
+        """Build the scoring statistics from accumulated document statistics"""
         stats = {}
         
         # Font size statistics
-        sizes = [b["size"] for b in text_blocks]
-        stats["avg_size"] = statistics.mean(sizes)
-        stats["median_size"] = statistics.median(sizes)
-        stats["max_size"] = max(sizes)
-        stats["size_std"] = statistics.stdev(sizes) if len(sizes) > 1 else 0
+        stats["avg_size"] = doc_stats.mean()
+        stats["median_size"] = doc_stats.median()
+        stats["max_size"] = doc_stats.max_size()
+        stats["size_std"] = doc_stats.stdev()
         
         # Font statistics
-        font_counter = Counter(b["font"] for b in text_blocks)
-        stats["common_fonts"] = [font for font, count in font_counter.most_common(3)]
-        
-        # Position statistics per page
-        page_stats = defaultdict(lambda: {"widths": [], "heights": []})
-        for block in text_blocks:
-            page_stats[block["page"]]["widths"].append(block["x1"] - block["x0"])
-            page_stats[block["page"]]["heights"].append(block["y1"] - block["y0"])
+        stats["common_fonts"] = doc_stats.common_fonts(3)
         
-        stats["page_stats"] = dict(page_stats)
+        # Style histogram: spans sharing font and bold flag within 1pt of size
+        stats["style_counts"] = self._count_similar_styles(doc_stats.style_counts)
         
         return stats
     
     def _score_heading_candidates(self, text_blocks, stats):
         """Score each text block as a potential heading"""
         candidates = []
+        pruned_eligibility = pruned_prefilter = pruned_score = 0
         
-        for i, block in enumerate(text_blocks):
+        for block in text_blocks:
             # Skip very short or very long text
-            text_len = len(block["text"].strip())
-            if text_len < 2 or text_len > 200:
+            text = block["text"].strip()
+            if len(text) < 2 or len(text) > 200:
+                pruned_eligibility += 1
                 continue
             
             # Skip excluded patterns
             if self._matches_exclude_pattern(block["text"]):
+                pruned_eligibility += 1
                 continue
             
-            score = self._calculate_heading_score(block, text_blocks, stats, i)
+            # Stage 1: size, bold, pattern and case only
+            size_ratio = block["size"] / stats["avg_size"]
+            has_pattern = self._has_heading_pattern(text)
+            if not self._passes_prefilter(text, block, size_ratio, has_pattern, stats):
+                pruned_prefilter += 1
+                continue
+            
+            # Stage 2: the remaining heuristics, which look at neighbouring spans
+            score = (self._text_style_score(text, size_ratio, block["is_bold"], has_pattern)
+                     + self._context_score(block, stats))
             
             if score > 0:
                 candidates.append({
                     "score": score,
-                    "text": block["text"].strip(),
+                    "text": text,
                     "page": block["page"],
                     "size": block["size"],
                     "is_bold": block["is_bold"],
                     "y0": block["y0"],
                     "original_block": block
                 })
+            else:
+                pruned_score += 1
         
+        self._count_pruned(pruned_eligibility, pruned_prefilter, pruned_score)
         return candidates
     
-    def _calculate_heading_score(self, block, text_blocks, stats, index):
-        """Calculate heading score using multiple heuristics"""
+    def _passes_prefilter(self, text, block, size_ratio, has_pattern, stats):
+        """First-stage check: whether a span is worth the context heuristics"""
+        if not self.prefilter or block["is_bold"] or has_pattern:
+            return True
+        
+        # Anything set larger than the median body size, even slightly, may be a
+        # plain heading that scores on spacing, case and consistency
+        if size_ratio >= self.prefilter_min_size_ratio or block["size"] > stats["median_size"]:
+            return True
+        
+        # Body-sized headings still need title or upper case to score
+        return text.istitle() or text.isupper()
+    
+    def _count_pruned(self, eligibility, prefilter, score):
+        """Report the spans dropped by each scoring stage"""
+        metrics = self.instrumentation
+        metrics.count("pruned_eligibility", eligibility)
+        metrics.count("pruned_prefilter", prefilter)
+        metrics.count("pruned_score", score)
+        logger.debug(f"Pruned {eligibility} spans by length or exclusion, {prefilter} by the "
+                     f"prefilter and {score} by score")
+    
+    def _text_style_score(self, text, size_ratio, is_bold, has_pattern):
+        """Heuristics that only look at the span itself"""
         score = 0
-        text = block["text"].strip()
         
         # 1. Font size heuristic
-        size_ratio = block["size"] / stats["avg_size"]
         if size_ratio >= 1.5:
             score += 3
         elif size_ratio >= 1.2:
@@ -131,17 +240,13 @@ class HeadingDetector:
             score += 1
         
         # 2. Bold text
-        if block["is_bold"]:
+        if is_bold:
             score += 2
         
         # 3. Numbered/structured pattern
-        if self._has_heading_pattern(text):
+        if has_pattern:
             score += 3
         
-        # 4. Position and spacing
-        spacing_score = self._calculate_spacing_score(block, text_blocks, index)
-        score += spacing_score
-        
         # 5. Length heuristic (headings are usually not too long)
         if 5 <= len(text) <= 80:
             score += 1
@@ -152,87 +257,94 @@ class HeadingDetector:
         if text.istitle() or text.isupper():
             score += 1
         
+        return score
+    
+    def _context_score(self, block, stats):
+        """Heuristics that compare the span with its neighbours and the document"""
+        score = 0
+        
+        # 4. Position and spacing
+        score += self._calculate_spacing_score(block, stats["page_index"])
+        
         # 7. Standalone line (not part of paragraph)
-        if self._is_standalone_line(block, text_blocks, index):
+        if self._is_standalone_line(block, stats["page_index"]):
             score += 1
         
         # 8. Font consistency with other potential headings
-        font_score = self._calculate_font_consistency_score(block, text_blocks)
-        score += font_score
+        score += self._calculate_font_consistency_score(block, stats)
         
         return score
     
     def _has_heading_pattern(self, text):
         """Check if text matches common heading patterns"""
-        for pattern in self.heading_patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                return True
-        return False
+        return match_heading(text) is not None
     
     def _matches_exclude_pattern(self, text):
         """Check if text matches patterns to exclude"""
-        text_lower = text.lower().strip()
-        for pattern in self.exclude_patterns:
-            if re.match(pattern, text_lower):
-                return True
-        return False
+        return match_exclusion(text) is not None
     
-    def _calculate_spacing_score(self, block, text_blocks, index):
+    def _calculate_spacing_score(self, block, page_index):
         """Calculate score based on vertical spacing around the text"""
         score = 0
         
-        same_page_blocks = [b for b in text_blocks if b["page"] == block["page"]]
-        
-        # Find blocks before and after
-        before_blocks = [b for b in same_page_blocks if b["y1"] < block["y0"]]
-        after_blocks = [b for b in same_page_blocks if b["y0"] > block["y1"]]
-        
         # Check spacing above
-        if before_blocks:
-            closest_above = max(before_blocks, key=lambda b: b["y1"])
+        closest_above = page_index.nearest_above(block)
+        if closest_above is not None:
             space_above = block["y0"] - closest_above["y1"]
             if space_above > 15:  # Significant space above
                 score += 1
         
         # Check spacing below
-        if after_blocks:
-            closest_below = min(after_blocks, key=lambda b: b["y0"])
+        closest_below = page_index.nearest_below(block)
+        if closest_below is not None:
             space_below = closest_below["y0"] - block["y1"]
             if space_below > 10:  # Some space below
                 score += 1
         
         return score
     
-    def _is_standalone_line(self, block, text_blocks, index):
+    def _is_standalone_line(self, block, page_index):
         """Check if block is a standalone line (not part of a paragraph)"""
-        same_page_blocks = [b for b in text_blocks if b["page"] == block["page"]]
-        
-        # Find nearby blocks
-        nearby_blocks = [
-            b for b in same_page_blocks 
-            if abs(b["y0"] - block["y0"]) < 5 and b != block
-        ]
-        
         # If no nearby blocks on same line, it's standalone
-        return len(nearby_blocks) == 0
+        for nearby in page_index.same_line(block):
+            if nearby != block:
+                return False
+        return True
     
-    def _calculate_font_consistency_score(self, block, text_blocks):
+    def _count_similar_styles(self, style_counter):
+        """Map each (font, size, bold) signature to the number of spans with a similar style"""
+        groups = defaultdict(list)
+        for (font, size, is_bold), count in style_counter.items():
+            groups[(font, is_bold)].append((size, count))
+        
+        similar_counts = {}
+        for (font, is_bold), entries in groups.items():
+            entries.sort()
+            sizes = [size for size, _ in entries]
+            
+            for size, _ in entries:
+                # Only sizes inside the bisected window can be within 1pt
+                start = bisect.bisect_left(sizes, size - 1)
+                end = bisect.bisect_right(sizes, size + 1)
+                similar_counts[(font, size, is_bold)] = sum(
+                    count for other_size, count in entries[start:end]
+                    if abs(other_size - size) < 1
+                )
+        
+        return similar_counts
+    
+    def _calculate_font_consistency_score(self, block, stats):
         """Score based on font consistency with other potential headings"""
-        # Find other blocks with similar properties
-        similar_blocks = [
-            b for b in text_blocks
-            if (b["font"] == block["font"] and 
-                abs(b["size"] - block["size"]) < 1 and
-                b["is_bold"] == block["is_bold"])
-        ]
+        # Count blocks with the same font, bold flag and a size within 1pt
+        similar_count = stats["style_counts"][(block["font"], block["size"], block["is_bold"])]
         
         # If there are other similar blocks, they might form a heading style
-        if len(similar_blocks) >= 2:
+        if similar_count >= 2:
             return 1
         
         return 0
     
-    def _select_headings(self, candidates, stats):
+    def _select_headings(self, candidates, stats, mean_score=None):
         """Select final headings from candidates"""
         if not candidates:
             return []
@@ -241,11 +353,13 @@ class HeadingDetector:
         candidates.sort(key=lambda x: x["score"], reverse=True)
         
         # Take top candidates with minimum score threshold
-        min_score = max(2, statistics.mean([c["score"] for c in candidates]) * 0.7)
+        if mean_score is None:
+            mean_score = statistics.mean([c["score"] for c in candidates])
+        min_score = max(2, mean_score * 0.7)
         selected = [c for c in candidates if c["score"] >= min_score]
         
         # Limit to reasonable number
-        selected = selected[:50]  # Max 50 headings
+        selected = selected[:self.max_headings]
         
         # Sort by page and position
         selected.sort(key=lambda x: (x["page"], x["y0"]))
@@ -253,18 +367,19 @@ class HeadingDetector:
         return selected
     
     def _assign_levels(self, headings):
-        """Assign H1, H2, H3 levels to headings"""
+        """Assign H1 to H{max_level} levels to headings"""
         if not headings:
             return []
         
-        # Group headings by similar properties
-        size_groups = self._group_by_size(headings)
+        # Rank distinct sizes once, largest first
+        sizes = sorted({heading["size"] for heading in headings}, reverse=True)
+        size_rank = {size: rank for rank, size in enumerate(sizes)}
         
-        # Assign levels based on size groups and patterns
+        # Assign levels based on size rank and numbering
         leveled = []
         
         for heading in headings:
-            level = self._determine_level(heading, size_groups, headings)
+            level = self._determine_level(heading, size_rank)
             
             leveled.append({
                 "level": level,
@@ -274,50 +389,12 @@ class HeadingDetector:
         
         return leveled
     
-    def _group_by_size(self, headings):
-        """Group headings by font size"""
-        size_groups = {}
-        
-        for heading in headings:
-            size = heading["size"]
-            if size not in size_groups:
-                size_groups[size] = []
-            size_groups[size].append(heading)
-        
-        # Sort sizes in descending order
-        sorted_sizes = sorted(size_groups.keys(), reverse=True)
-        
-        return {i: size_groups[size] for i, size in enumerate(sorted_sizes)}
-    
-    def _determine_level(self, heading, size_groups, all_headings):
-        """Determine heading level (H1, H2, H3)"""
-        # Find which size group this heading belongs to
-        heading_size = heading["size"]
-        
-        # Map size groups to levels
-        size_to_group = {}
-        for group_idx, size in enumerate(sorted(set(h["size"] for h in all_headings), reverse=True)):
-            size_to_group[size] = group_idx
-        
-        group_idx = size_to_group[heading_size]
-        
-        # Also consider numbering pattern
-        text = heading["text"]
-        
-        # Check for numbered patterns to refine level
-        if re.match(r'^\d+\.?\s+', text):  # 1. Main section
-            level = "H1"
-        elif re.match(r'^\d+\.\d+\.?\s+', text):  # 1.1 Subsection
-            level = "H2"
-        elif re.match(r'^\d+\.\d+\.\d+\.?\s+', text):  # 1.1.1 Sub-subsection
-            level = "H3"
-        else:
-            # Use size-based mapping
-            if group_idx == 0:
-                level = "H1"
-            elif group_idx == 1:
-                level = "H2"
-            else:
-                level = "H3"
-        
-        return level
\ No newline at end of file
+    def _determine_level(self, heading, size_rank):
+        """Determine heading level from numbering depth, else from size rank"""
+        # Numbering depth sets the level: 1. / 1.1 / 1.1.1 ...
+        depth = numbering_depth(heading["text"])
+        if 0 < depth <= self.max_level:
+            return f"H{depth}"
+        
+        # Use size-based mapping, deeper sizes share the lowest level
+        return f"H{min(size_rank[heading['size']] + 1, self.max_level)}"
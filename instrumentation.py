@@ -0,0 +1,144 @@
+"""
+Instrumentation - Per-document stage timings and counters for the pipeline
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Shared no-op context manager returned when instrumentation is disabled
+_NULL_STAGE = nullcontext()
+
+
+class NullInstrumentation:
+    """Disabled instrumentation: every call is a no-op"""
+
+    enabled = False
+
+    def start(self, document):
+        pass
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def count(self, name, value=1):
+        pass
+
+    def finish(self, status="ok", error=None):
+        pass
+
+
+class Instrumentation:
+    """Records stage durations and counts for each processed document"""
+
+    enabled = True
+
+    def __init__(self, metrics_path=None, prometheus_path=None):
+        """
+        Args:
+            metrics_path: File receiving one JSON line per document (stderr log if None)
+            prometheus_path: Optional Prometheus text-format file of cumulative totals
+        """
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+
+        # Cumulative totals across documents for the Prometheus export
+        self.documents = defaultdict(int)
+        self.stage_seconds = defaultdict(float)
+        self.counters = defaultdict(int)
+
+        self._record = None
+        self._start_time = None
+
+    def start(self, document):
+        """Begin a record for one document"""
+        self._record = {"document": str(document), "stages": {}, "counts": {}}
+        self._start_time = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a pipeline stage; repeated stages accumulate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stages = self._record["stages"]
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        """Add to a per-document counter"""
+        counts = self._record["counts"]
+        counts[name] = counts.get(name, 0) + value
+
+    def finish(self, status="ok", error=None):
+        """Close the current record and emit it"""
+        record = self._record
+        if record is None:
+            return
+        self._record = None
+
+        record["status"] = status
+        record["total_seconds"] = time.perf_counter() - self._start_time
+        if error is not None:
+            record["error"] = error
+
+        self.documents[status] += 1
+        for name, seconds in record["stages"].items():
+            self.stage_seconds[name] += seconds
+        for name, value in record["counts"].items():
+            self.counters[name] += value
+
+        self._write_json_line(record)
+        if self.prometheus_path is not None:
+            self._write_prometheus()
+
+    def _write_json_line(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        if self.metrics_path is None:
+            logger.info(f"Metrics: {line}")
+            return
+
+        # One write per line keeps appends from several processes intact
+        with open(self.metrics_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def _write_prometheus(self):
+        """Rewrite the Prometheus text file atomically with cumulative totals"""
+        lines = [
+            "# HELP pdf_extractor_documents_total Documents processed by status",
+            "# TYPE pdf_extractor_documents_total counter",
+        ]
+        for status, value in sorted(self.documents.items()):
+            lines.append(f'pdf_extractor_documents_total{{status="{status}"}} {value}')
+
+        lines += [
+            "# HELP pdf_extractor_stage_seconds_total Time spent per pipeline stage",
+            "# TYPE pdf_extractor_stage_seconds_total counter",
+        ]
+        for stage, seconds in sorted(self.stage_seconds.items()):
+            lines.append(f'pdf_extractor_stage_seconds_total{{stage="{stage}"}} {seconds:.6f}')
+
+        for name, value in sorted(self.counters.items()):
+            metric = f"pdf_extractor_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        directory = self.prometheus_path.parent
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, self.prometheus_path)
+        except OSError as e:
+            logger.warning(f"Could not write Prometheus metrics: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,189 @@
+"""
+JSON Writer - Serializes results with orjson when available and writes them
+as atomic per-PDF files or rotating JSON Lines
+"""
+
+import gzip
+import json
+import os
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # Serialization falls back to the stdlib encoder
+    orjson = None
+
+# File suffix for each JSON Lines compression option
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+def dumps(result, compact=False):
+    """
+    Serialize a result to UTF-8 JSON bytes
+
+    Args:
+        result: JSON-compatible object
+        compact: Omit all optional whitespace instead of indenting by 2
+
+    Returns:
+        bytes: Encoded JSON, identical in layout for both encoders
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(result, option=0 if compact else orjson.OPT_INDENT_2)
+        except TypeError:
+            # orjson is stricter (e.g. non-string keys, big ints); let the stdlib try
+            pass
+
+    if compact:
+        text = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(result, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+def _create_temp_file(path):
+    """
+    Create a uniquely named temporary file beside path
+
+    Unlike mkstemp, the file is created with mode 0o666 so the kernel applies
+    the umask and outputs get the permissions a plain open() would give them.
+
+    Returns:
+        tuple: (file descriptor, temporary path)
+    """
+    while True:
+        tmp_path = path.with_name(f".{path.name}.{os.urandom(6).hex()}.tmp")
+        try:
+            return os.open(tmp_path, _TEMP_FLAGS, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+def write_json(path, result, compact=False):
+    """Write a result to path via a temporary file, so readers never see partial JSON"""
+    path = Path(path)
+    data = dumps(result, compact)
+
+    fd, tmp_path = _create_temp_file(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DirectoryWriter:
+    """Writes each record's result to <output_dir>/<pdf stem>.json"""
+
+    # Per-file outputs are named after the PDF, so records need no content hash
+    content_hash = False
+
+    def __init__(self, output_dir, compact=False):
+        self.output_dir = Path(output_dir)
+        self.compact = compact
+
+    def write(self, record):
+        """Write a record with "file" and "result" keys"""
+        output_file = self.output_dir / f"{Path(record['file']).stem}.json"
+        write_json(output_file, record["result"], self.compact)
+
+    def close(self):
+        pass
+
+
+class JsonLinesWriter:
+    """Appends records as JSON lines to size-rotated, optionally compressed files"""
+
+    content_hash = True
+
+    def __init__(self, output_dir, prefix="results", compression=None, max_bytes=1024 * 1024 * 1024):
+        """
+        Args:
+            output_dir: Directory receiving <prefix>-NNNNN.jsonl[.gz|.zst] files
+            prefix: File name prefix
+            compression: None, "gzip" or "zstd"
+            max_bytes: Uncompressed bytes per file before rotating to the next
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression}")
+        # zstandard is imported only when zstd output is requested
+        self._zstandard = None
+        if compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstd compression requires the zstandard package")
+            self._zstandard = zstandard
+
+        self.output_dir = Path(output_dir)
+        self.prefix = prefix
+        self.compression = compression
+        self.max_bytes = max_bytes
+
+        self.paths = []
+        self._raw = None
+        self._stream = None
+        self._bytes_written = 0
+        self._next_index = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, record):
+        """Append one record and flush it, so a crash loses at most the record being written"""
+        line = dumps(record, compact=True) + b"\n"
+
+        # A record larger than max_bytes still gets a file of its own
+        if self._stream is None or (self._bytes_written and self._bytes_written + len(line) > self.max_bytes):
+            self._open_next()
+
+        self._stream.write(line)
+        self._bytes_written += len(line)
+
+        # Sync flushes end every record on a decodable boundary of the compressed stream
+        if self.compression == "gzip":
+            self._stream.flush()
+        elif self.compression == "zstd":
+            self._stream.flush(self._zstandard.FLUSH_BLOCK)
+        self._raw.flush()
+
+    def close(self):
+        """Finish the current file"""
+        if self._stream is None:
+            return
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        self._raw = self._stream = None
+
+    def _open_next(self):
+        """Close the current file and start the next unused one, never overwriting old runs"""
+        self.close()
+
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        while True:
+            path = self.output_dir / f"{self.prefix}-{self._next_index:05d}.jsonl{suffix}"
+            self._next_index += 1
+            try:
+                self._raw = open(path, "xb")
+                break
+            except FileExistsError:
+                continue
+
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        elif self.compression == "zstd":
+            self._stream = self._zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+
+        self._bytes_written = 0
+        self.paths.append(path)
@@ -4,28 +4,353 @@ PDF Document Structure Extractor
 Main entry point for processing PDFs and extracting hierarchical outlines
 """
 
-import os
+import time
+
+# Taken before the other imports so --profile-startup reports them too
+STARTED = time.perf_counter()
+
 import sys
+
+# Installed ahead of main.py's own imports so they are timed as well
+_startup_profiler = None
+if "--profile-startup" in sys.argv[1:]:
+    from startup_profile import ImportProfiler
+    _startup_profiler = ImportProfiler()
+    _startup_profiler.install()
+
+import os
+import argparse
 import logging
-import time
-import json
 from pathlib import Path
-from pdf_processor import PDFProcessor
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('/app/extraction.log')
-    ]
-)
+from json_writer import DirectoryWriter, JsonLinesWriter
+from result_cache import content_digest
+
+# The pipeline (PyMuPDF) and process pools are imported where first
+# needed, so runs with nothing to do or only cache hits start quickly
+
+LOG_FILE = Path("/app/extraction.log")
 
 logger = logging.getLogger(__name__)
 
-def main():
+# Per-process processor used by pool workers
+_worker_processor = None
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Extract titles and outlines from PDFs")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of worker processes (default: 1, process files serially)"
+    )
+    parser.add_argument(
+        "--page-workers", type=int, default=1,
+        help="Worker processes for splitting the pages of each PDF in serial mode"
+    )
+    parser.add_argument(
+        "--cache-dir", default=None,
+        help="Directory for the content-hash result cache (disabled by default)"
+    )
+    parser.add_argument(
+        "--cache-max-mb", type=int, default=256,
+        help="Size limit of the result cache in MB (default: 256)"
+    )
+    parser.add_argument(
+        "--streaming", action="store_true",
+        help="Process pages one at a time in two passes to bound memory use"
+    )
+    parser.add_argument(
+        "--time-budget", type=float, default=None,
+        help="Seconds allowed for reading each PDF; lifts the 50-page limit and "
+             "reports pages covered in the output"
+    )
+    parser.add_argument(
+        "--metrics-file", default=None,
+        help="Append per-PDF stage timings and counts to this JSON Lines file"
+    )
+    parser.add_argument(
+        "--prometheus-file", default=None,
+        help="Write cumulative metrics to this Prometheus text file"
+    )
+    parser.add_argument(
+        "--max-heading-level", type=int, default=3, choices=range(1, 7), metavar="{1-6}",
+        help="Deepest heading level in the outline, e.g. 6 to emit H4-H6 (default: 3)"
+    )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="Write JSON without indentation or whitespace"
+    )
+    parser.add_argument(
+        "--jsonl", action="store_true",
+        help="Append all results to rotating JSON Lines files instead of one file per PDF"
+    )
+    parser.add_argument(
+        "--jsonl-compression", choices=["gzip", "zstd"], default=None,
+        help="Compress JSON Lines output (zstd needs the zstandard package)"
+    )
+    parser.add_argument(
+        "--jsonl-max-mb", type=int, default=1024,
+        help="Uncompressed size of each JSON Lines file before rotating (default: 1024)"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Keep running and process new or modified PDFs as they appear in the input directory"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=2.0,
+        help="Seconds between input directory scans in watch mode (default: 2)"
+    )
+    parser.add_argument(
+        "--manifest", default=None,
+        help="Manifest of processed files for watch mode (default: <output>/.manifest.json)"
+    )
+    parser.add_argument(
+        "--extraction-backend", choices=["lean", "dict"], default="lean",
+        help="Span extraction backend: lean skips image data, dict is the full PyMuPDF "
+             "dict output (default: lean)"
+    )
+    parser.add_argument(
+        "--title-only", action="store_true",
+        help="Extract only titles, from metadata or page 1, with an empty outline"
+    )
+    parser.add_argument(
+        "--merge-lines", action="store_true",
+        help="Merge spans on the same baseline into whole lines before heading detection"
+    )
+    parser.add_argument(
+        "--no-toc", action="store_true",
+        help="Always detect headings from text instead of using the PDF's bookmarks"
+    )
+    parser.add_argument(
+        "--toc-spot-checks", type=int, default=3,
+        help="Bookmarks whose text must appear on their target page before the bookmarks "
+             "are used as the outline; 0 trusts them unchecked (default: 3)"
+    )
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="Log the time spent importing each module and the total run time"
+    )
+    return parser.parse_args(argv)
+
+def configure_logging():
+    """Log to stdout and, when its directory exists, to the extraction log file"""
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE.parent.is_dir():
+        # The file is opened by the first record rather than at startup
+        handlers.append(logging.FileHandler(LOG_FILE, delay=True))
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+def processor_options(args):
+    """PDFProcessor keyword arguments derived from command line options"""
+    return {
+        "cache_dir": args.cache_dir,
+        "cache_max_bytes": args.cache_max_mb * 1024 * 1024,
+        "streaming": args.streaming,
+        "time_budget": args.time_budget,
+        "metrics_path": args.metrics_file,
+        "prometheus_path": args.prometheus_file,
+        "max_heading_level": args.max_heading_level,
+        "extraction_backend": args.extraction_backend,
+        "title_only": args.title_only,
+        "merge_lines": args.merge_lines,
+        "use_toc": not args.no_toc,
+        "toc_spot_checks": args.toc_spot_checks,
+    }
+
+def process_file(processor, pdf_file, content_hash=False, sha256=None):
+    """
+    Process one PDF into an output record, falling back to an error result
+    
+    Args:
+        processor: PDFProcessor instance
+        pdf_file: Path to PDF file
+        content_hash: Add the sha256 of the PDF's bytes to the record
+        sha256: Content hash already computed by the caller
+        
+    Returns:
+        tuple: (record with file, sha256, seconds and result, error message or None)
+    """
+    start_time = time.time()
+    record = {"file": pdf_file.name}
+    
+    try:
+        if content_hash:
+            record["sha256"] = sha256 or content_digest(pdf_file).hexdigest()
+        
+        # Process PDF
+        result = processor.process_pdf(pdf_file)
+        error = None
+        
+    except Exception as e:
+        logger.error(f"Error processing {pdf_file.name}: {str(e)}")
+        # Create error output
+        result = error_result(str(e))
+        error = str(e)
+    
+    record["seconds"] = round(time.time() - start_time, 6)
+    record["result"] = result
+    return record, error
+
+def error_result(message):
+    """Output written in place of a result for a PDF that could not be processed"""
+    return {
+        "title": "Error: Could not extract title",
+        "outline": [],
+        "error": message
+    }
+
+def _file_size(pdf_file):
+    """Size used to schedule a file; one that vanished sorts last and fails in its worker"""
+    try:
+        return pdf_file.stat().st_size
+    except OSError:
+        return -1
+
+def unfinished_record(pdf_file, message, content_hash=False):
+    """Error record for a PDF whose worker died before returning a record"""
+    record = {"file": pdf_file.name}
+    if content_hash:
+        try:
+            record["sha256"] = content_digest(pdf_file).hexdigest()
+        except OSError:
+            pass
+    record["seconds"] = 0.0
+    record["result"] = error_result(message)
+    return record
+
+def open_writer(args, output_dir):
+    """Writer for per-PDF JSON files, or rotating JSON Lines files with --jsonl"""
+    if args.jsonl:
+        return JsonLinesWriter(
+            output_dir,
+            compression=args.jsonl_compression,
+            max_bytes=args.jsonl_max_mb * 1024 * 1024,
+        )
+    return DirectoryWriter(output_dir, args.compact)
+
+def _init_worker(options):
+    """Create the processor held by each pool worker"""
+    global _worker_processor
+    from pdf_processor import PDFProcessor
+    
+    # Each worker keeps its own totals, so give it its own Prometheus file
+    if options.get("prometheus_path"):
+        prometheus_path = Path(options["prometheus_path"])
+        options = dict(options, prometheus_path=prometheus_path.with_name(
+            f"{prometheus_path.stem}.{os.getpid()}{prometheus_path.suffix}"))
+    
+    _worker_processor = PDFProcessor(**options)
+
+def _process_in_worker(task):
+    """Pool entry point: process one file with the worker's processor"""
+    pdf_file, content_hash = task
+    return process_file(_worker_processor, pdf_file, content_hash)
+
+def process_serial(pdf_files, writer, options, page_workers=1):
+    """Process files one at a time in this process, writing each record as it completes"""
+    from pdf_processor import PDFProcessor
+    
+    processor = PDFProcessor(page_workers=page_workers, **options)
+    
+    try:
+        for pdf_file in pdf_files:
+            logger.info(f"Processing: {pdf_file.name}")
+            record, error = process_file(processor, pdf_file, writer.content_hash)
+            writer.write(record)
+            if error is None:
+                logger.info(f"Completed {pdf_file.name} in {record['seconds']:.2f}s")
+        
+        if processor.cache is not None:
+            logger.info(f"Cache hits: {processor.cache.hits}, misses: {processor.cache.misses}")
+    finally:
+        processor.close()
+
+def process_parallel(pdf_files, writer, options, workers):
+    """Spread files across a process pool, largest files first, writing records here"""
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    
+    # Schedule large files first so a long document does not finish last
+    pdf_files = sorted(pdf_files, key=_file_size, reverse=True)
+    tasks = [(pdf_file, writer.content_hash) for pdf_file in pdf_files]
+    
+    logger.info(f"Processing with {workers} worker processes")
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as executor:
+        futures = [executor.submit(_process_in_worker, task) for task in tasks]
+        
+        # Results are collected in submission order, keeping progress logs ordered.
+        # A worker that dies hard (e.g. a MuPDF crash) breaks the pool, and every
+        # file still queued or running then gets an error record.
+        for done, (pdf_file, future) in enumerate(zip(pdf_files, futures), start=1):
+            try:
+                record, error = future.result()
+            except BrokenProcessPool:
+                error = "Worker process died before finishing this file"
+                logger.error(f"Error processing {pdf_file.name}: {error}")
+                record = unfinished_record(pdf_file, error, writer.content_hash)
+            
+            writer.write(record)
+            status = "Failed" if error is not None else "Completed"
+            logger.info(f"[{done}/{len(tasks)}] {status} {record['file']} in {record['seconds']:.2f}s")
+
+def process_watched(input_dir, writer, options, manifest_path, poll_interval, page_workers=1):
+    """Process new and modified PDFs as they appear, until SIGTERM or SIGINT"""
+    import signal
+    import threading
+    from pdf_processor import PDFProcessor
+    from watch_folder import Manifest, watch_folder
+    
+    processor = PDFProcessor(page_workers=page_workers, **options)
+    stop_event = threading.Event()
+    
+    def stop(signum, frame):
+        logger.info(f"Received signal {signum}, stopping after the current file")
+        stop_event.set()
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    def handle(pdf_file, sha256):
+        logger.info(f"Processing: {pdf_file.name}")
+        record, error = process_file(processor, pdf_file, writer.content_hash, sha256)
+        writer.write(record)
+        if error is None:
+            logger.info(f"Completed {pdf_file.name} in {record['seconds']:.2f}s")
+    
+    try:
+        watch_folder(input_dir, Manifest(manifest_path), handle, poll_interval, stop_event)
+    finally:
+        processor.close()
+
+def main(argv=None):
     """Main function to process all PDFs in input directory"""
+    args = parse_args(argv)
+    configure_logging()
+    
+    if not args.profile_startup:
+        run(args)
+        return
+    
+    profiler = _startup_profiler
+    if profiler is None:
+        # Called with an argv of its own, so only imports from here on are timed
+        from startup_profile import ImportProfiler
+        profiler = ImportProfiler()
+        profiler.install()
+    try:
+        run(args)
+    finally:
+        profiler.uninstall()
+        profiler.report()
+        logger.info(f"Finished {time.perf_counter() - STARTED:.3f}s after startup")
+
+def run(args):
+    """Process the input directory once, or keep watching it"""
     input_dir = Path("/app/input")
     output_dir = Path("/app/output")
     
@@ -36,6 +361,31 @@ def main():
         logger.error(f"Input directory {input_dir} does not exist")
         sys.exit(1)
     
+    try:
+        writer = open_writer(args, output_dir)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    
+    try:
+        if args.watch:
+            run_watch(args, input_dir, output_dir, writer)
+        else:
+            run_batch(args, input_dir, writer)
+    finally:
+        writer.close()
+
+def run_watch(args, input_dir, output_dir, writer):
+    """Daemon mode: process PDFs as they arrive until stopped"""
+    if args.workers > 1:
+        logger.warning("--workers is ignored in watch mode")
+    
+    manifest_path = Path(args.manifest) if args.manifest else output_dir / ".manifest.json"
+    process_watched(input_dir, writer, processor_options(args), manifest_path,
+                    args.poll_interval, args.page_workers)
+
+def run_batch(args, input_dir, writer):
+    """Process every PDF currently in the input directory once"""
     # Find all PDF files
     pdf_files = list(input_dir.glob("*.pdf"))
     if not pdf_files:
@@ -44,41 +394,20 @@ def main():
     
     logger.info(f"Found {len(pdf_files)} PDF files to process")
     
-    processor = PDFProcessor()
     total_start_time = time.time()
     
-    for pdf_file in pdf_files:
-        try:
-            logger.info(f"Processing: {pdf_file.name}")
-            start_time = time.time()
-            
-            # Process PDF
-            result = processor.process_pdf(pdf_file)
-            
-            # Generate output filename
-            output_file = output_dir / f"{pdf_file.stem}.json"
-            
-            # Save result
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            
-            elapsed = time.time() - start_time
-            logger.info(f"Completed {pdf_file.name} in {elapsed:.2f}s")
-            
-        except Exception as e:
-            logger.error(f"Error processing {pdf_file.name}: {str(e)}")
-            # Create error output
-            error_result = {
-                "title": "Error: Could not extract title",
-                "outline": [],
-                "error": str(e)
-            }
-            output_file = output_dir / f"{pdf_file.stem}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(error_result, f, indent=2, ensure_ascii=False)
+    options = processor_options(args)
+    workers = min(args.workers, len(pdf_files))
+    if workers > 1:
+        if args.page_workers > 1:
+            # Pool workers are daemonic and cannot start their own workers
+            logger.warning("--page-workers is ignored when --workers is greater than 1")
+        process_parallel(pdf_files, writer, options, workers)
+    else:
+        process_serial(pdf_files, writer, options, args.page_workers)
     
     total_elapsed = time.time() - total_start_time
     logger.info(f"Processed {len(pdf_files)} files in {total_elapsed:.2f}s")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
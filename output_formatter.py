@@ -6,16 +6,21 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Valid heading levels in priority order
+HEADING_LEVELS = ["H1", "H2", "H3", "H4", "H5", "H6"]
+LEVEL_PRIORITY = {level: rank for rank, level in enumerate(HEADING_LEVELS, 1)}
+
 class OutputFormatter:
     """Formats extraction results into the required JSON structure"""
     
-    def format_output(self, title, headings):
+    def format_output(self, title, headings, coverage=None):
         """
         Format title and headings into required JSON structure
         
         Args:
             title: Extracted document title
             headings: List of detected headings with level, text, and page
+            coverage: Optional dict with pages_processed and page_count
             
         Returns:
             dict: Formatted output matching specification
@@ -46,7 +51,7 @@ class OutputFormatter:
                 continue
             
             # Normalize level
-            if level not in ["H1", "H2", "H3"]:
+            if level not in LEVEL_PRIORITY:
                 level = "H1"
             
             # Ensure page is integer
@@ -73,14 +78,19 @@ class OutputFormatter:
             })
         
         # Sort headings by page, then by level priority
-        level_priority = {"H1": 1, "H2": 2, "H3": 3}
-        clean_headings.sort(key=lambda h: (h["page"], level_priority.get(h["level"], 1)))
+        clean_headings.sort(key=lambda h: (h["page"], LEVEL_PRIORITY[h["level"]]))
         
         result = {
             "title": title,
             "outline": clean_headings
         }
         
+        # Only time-budgeted runs report how much of the document was read
+        if coverage is not None:
+            result["pages_processed"] = coverage["pages_processed"]
+            result["page_count"] = coverage["page_count"]
+            result["complete"] = coverage["pages_processed"] >= coverage["page_count"]
+        
         logger.info(f"Formatted output: title='{title}', {len(clean_headings)} headings")
         return result
     
@@ -0,0 +1,71 @@
+"""
+Page Index - Per-page spatial index for vertical neighbour lookups
+"""
+
+import bisect
+from collections import defaultdict
+
+
+class PageIndex:
+    """Indexes text blocks by page, sorted by vertical position"""
+
+    def __init__(self, text_blocks):
+        """
+        Build the index once per document
+
+        Args:
+            text_blocks: List of text blocks with formatting information
+        """
+        page_blocks = defaultdict(list)
+        for block in text_blocks:
+            page_blocks[block["page"]].append(block)
+
+        self._pages = {}
+        for page, blocks in page_blocks.items():
+            by_y0 = sorted(blocks, key=lambda b: b["y0"])
+            by_y1 = sorted(blocks, key=lambda b: b["y1"])
+            self._pages[page] = {
+                "y0_keys": [b["y0"] for b in by_y0],
+                "by_y0": by_y0,
+                "y1_keys": [b["y1"] for b in by_y1],
+                "by_y1": by_y1,
+            }
+
+    def nearest_above(self, block):
+        """Return the block on the same page whose bottom is closest above the block's top"""
+        entry = self._pages.get(block["page"])
+        if not entry:
+            return None
+
+        # Last block with y1 strictly less than this block's y0
+        pos = bisect.bisect_left(entry["y1_keys"], block["y0"])
+        if pos == 0:
+            return None
+        return entry["by_y1"][pos - 1]
+
+    def nearest_below(self, block):
+        """Return the block on the same page whose top is closest below the block's bottom"""
+        entry = self._pages.get(block["page"])
+        if not entry:
+            return None
+
+        # First block with y0 strictly greater than this block's y1
+        pos = bisect.bisect_right(entry["y0_keys"], block["y1"])
+        if pos == len(entry["y0_keys"]):
+            return None
+        return entry["by_y0"][pos]
+
+    def same_line(self, block, tolerance=5):
+        """Yield blocks on the same page whose top is within tolerance of the block's top"""
+        entry = self._pages.get(block["page"])
+        if not entry:
+            return
+
+        y0 = block["y0"]
+        keys = entry["y0_keys"]
+        start = bisect.bisect_left(keys, y0 - tolerance)
+        end = bisect.bisect_right(keys, y0 + tolerance)
+
+        for candidate in entry["by_y0"][start:end]:
+            if abs(candidate["y0"] - y0) < tolerance:
+                yield candidate
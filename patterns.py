@@ -0,0 +1,76 @@
+"""
+Patterns - Compiled heading, exclusion and title-noise regexes shared by the pipeline
+"""
+
+import re
+from collections import namedtuple
+
+# Pattern class of a match, plus numbering depth for numbered headings (else 0)
+PatternMatch = namedtuple("PatternMatch", ["kind", "depth"])
+
+# Heading prefixes, matched case-insensitively against stripped text
+HEADING_PATTERN = re.compile(
+    r"(?P<numbered>\d+(?:\.\d+){0,2})\.?\s+"  # 1. / 1.1 / 1.1.1 with optional trailing dot
+    r"|(?P<roman>[IVXLCDM]+)\.?\s+"  # Roman numerals
+    r"|(?P<letter>[A-Z])\.?\s+"  # A. or A
+    r"|(?P<lettered>[a-z])\)?\s+"  # a) or a
+    r"|(?P<bullet>[•▪▫◦‣⁃])\s+"
+    r"|(?P<dash>[-*])\s+",
+    re.IGNORECASE,
+)
+
+# Section numbering up to six levels deep (1 through 1.1.1.1.1.1)
+NUMBERING_PATTERN = re.compile(r"(?P<numbering>\d+(?:\.\d+){0,5})\.?\s+")
+
+# Non-heading text, matched against lowercased stripped text
+EXCLUDE_PATTERN = re.compile(
+    r"(?P<page_number>\d+$)"
+    r"|(?P<page>page\s+\d+)"
+    r"|(?P<figure>fig\w*\s+\d+)"
+    r"|(?P<table>table\s+\d+)"
+    r"|(?P<appendix>appendix\s*[a-z]?$)"
+)
+
+# Text that cannot be a title, matched against lowercased stripped text
+TITLE_NOISE_PATTERN = re.compile(
+    r"(?P<number>\d+$)"  # Just numbers
+    r"|(?P<page>page\s+\d+)"  # Page numbers
+    r"|(?P<chapter>chapter\s+\d+)"  # Chapter numbers
+    r"|(?P<figure>fig\w*\s+\d+)"  # Figure references
+    r"|(?P<table>table\s+\d+)"  # Table references
+    r"|(?P<short>\w{1,3}\s*$)"  # Very short text
+    r"|(?P<punctuation>[^\w]*$)"  # Only punctuation
+)
+
+def match_heading(text):
+    """
+    Match a heading prefix at the start of text
+
+    Args:
+        text: Stripped heading text
+
+    Returns:
+        PatternMatch with the pattern class and numbering depth, or None
+    """
+    match = HEADING_PATTERN.match(text)
+    if match is None:
+        return None
+
+    kind = match.lastgroup
+    depth = match.group("numbered").count(".") + 1 if kind == "numbered" else 0
+    return PatternMatch(kind, depth)
+
+def numbering_depth(text):
+    """Return how many levels deep a section number prefix is (1.2.3 -> 3), or 0"""
+    match = NUMBERING_PATTERN.match(text)
+    return match.group("numbering").count(".") + 1 if match else 0
+
+def match_exclusion(text):
+    """Return the exclusion class for text that is never a heading, or None"""
+    match = EXCLUDE_PATTERN.match(text.lower().strip())
+    return match.lastgroup if match else None
+
+def match_title_noise(text):
+    """Return the noise class for text that is never a title, or None"""
+    match = TITLE_NOISE_PATTERN.match(text.lower().strip())
+    return match.lastgroup if match else None
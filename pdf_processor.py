@@ -3,21 +3,120 @@ PDF Processor - Core logic for extracting document structure
 """
 
 import logging
-import fitz  # PyMuPDF
+import time
+from collections import Counter
 from pathlib import Path
 from title_extractor import TitleExtractor
 from heading_detector import HeadingDetector
+from toc_extractor import TocExtractor
 from output_formatter import OutputFormatter
+from span_table import SpanTable
+from result_cache import ResultCache
+from doc_stats import DocumentStatistics
+from instrumentation import Instrumentation, NullInstrumentation
 
 logger = logging.getLogger(__name__)
 
+# Span extraction backends: "lean" asks PyMuPDF for text only, leaving out
+# image blocks; "dict" is the full get_text("dict") output
+EXTRACTION_BACKENDS = ("lean", "dict")
+
 class PDFProcessor:
     """Main PDF processing class that orchestrates extraction"""
     
-    def __init__(self):
+    # Limit to 50 pages as specified
+    max_pages = 50
+    
+    def __init__(self, page_workers=1, parallel_min_pages=8, cache_dir=None,
+                 cache_max_bytes=256 * 1024 * 1024, streaming=False, time_budget=None,
+                 metrics_path=None, prometheus_path=None, max_heading_level=3,
+                 extraction_backend="lean", title_only=False, use_toc=True, toc_spot_checks=3,
+                 merge_lines=False):
+        """
+        Args:
+            page_workers: Worker processes used to extract pages of one document
+            parallel_min_pages: Smallest page count that is split across workers
+            cache_dir: Directory for the on-disk result cache (disabled if None)
+            cache_max_bytes: Size limit of the result cache
+            streaming: Process pages one at a time in two passes to bound memory
+            time_budget: Seconds allowed for reading pages; lifts the page limit
+                and reports page coverage in the output (disabled if None)
+            metrics_path: JSON Lines file for per-document stage timings and counts
+            prometheus_path: Prometheus text file for cumulative metrics
+            max_heading_level: Deepest heading level in the outline (1-6 for H1-H6)
+            extraction_backend: Span extraction backend, one of EXTRACTION_BACKENDS
+            title_only: Resolve only the title, from metadata or page 1, and
+                return an empty outline without reading pages 2..N
+            use_toc: Take the outline from the PDF's bookmarks when they are
+                plausible, skipping span extraction and heading detection
+            toc_spot_checks: Bookmarks whose text must be found on their target
+                page before the bookmarks are used (0 trusts them unchecked)
+            merge_lines: Merge adjacent spans on the same baseline into one
+                line carrying the dominant font, size and flags
+        """
+        # Instrumentation is a no-op unless a metrics destination is given
+        if metrics_path is not None or prometheus_path is not None:
+            self.instrumentation = Instrumentation(metrics_path, prometheus_path)
+        else:
+            self.instrumentation = NullInstrumentation()
+        
         self.title_extractor = TitleExtractor()
-        self.heading_detector = HeadingDetector()
+        self.heading_detector = HeadingDetector(
+            instrumentation=self.instrumentation, max_level=max_heading_level
+        )
         self.output_formatter = OutputFormatter()
+        self.toc_extractor = TocExtractor(spot_checks=toc_spot_checks) if use_toc else None
+        
+        if extraction_backend not in EXTRACTION_BACKENDS:
+            raise ValueError(f"Unknown extraction backend: {extraction_backend}")
+        self.extraction_backend = extraction_backend
+        self.title_only = title_only
+        self.merge_lines = merge_lines
+        
+        self.page_workers = page_workers
+        self.parallel_min_pages = parallel_min_pages
+        self._page_executor = None
+        self.streaming = streaming
+        self.time_budget = time_budget
+        
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = ResultCache(cache_dir, cache_max_bytes, config=self._output_config())
+    
+    def _output_config(self):
+        """Settings that change the extracted output, used to key cached results"""
+        return {
+            "max_pages": self.max_pages,
+            "time_budget": self.time_budget is not None,
+            "max_heading_level": self.heading_detector.max_level,
+            "title_only": self.title_only,
+            "toc_spot_checks": self.toc_extractor.spot_checks if self.toc_extractor else None,
+            "merge_lines": self.merge_lines,
+        }
+    
+    def close(self):
+        """Shut down the page extraction workers, if any were started"""
+        if self._page_executor is not None:
+            self._page_executor.shutdown()
+            self._page_executor = None
+    
+    def extract_title(self, pdf_path):
+        """
+        Extract only the title of a PDF, reading its metadata and at most page 1
+        
+        Args:
+            pdf_path: Path to PDF file
+            
+        Returns:
+            str: Extracted title
+        """
+        import fitz  # PyMuPDF
+        doc = fitz.open(str(pdf_path))
+        try:
+            title, _ = self._resolve_title(doc)
+        finally:
+            doc.close()
+        return title
     
     def process_pdf(self, pdf_path):
         """
@@ -29,73 +128,363 @@ class PDFProcessor:
         Returns:
             dict: Structured output with title and outline
         """
+        metrics = self.instrumentation
+        metrics.start(pdf_path)
+        
         try:
-            # Open PDF document
+            result = self._process(pdf_path, metrics)
+        except Exception as e:
+            logger.error(f"Error processing PDF: {str(e)}")
+            metrics.finish("error", str(e))
+            raise
+        
+        metrics.finish()
+        return result
+    
+    def _process(self, pdf_path, metrics):
+        """Run the pipeline for one PDF, recording stages on metrics"""
+        # Unchanged files are served from the cache without opening them
+        cache_key = None
+        if self.cache is not None:
+            with metrics.stage("cache_lookup"):
+                cache_key = self.cache.key_for(pdf_path)
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                metrics.count("cache_hits")
+                return cached
+            metrics.count("cache_misses")
+        
+        # Open PDF document; PyMuPDF is imported here so cache hits never load it
+        with metrics.stage("open"):
+            import fitz  # PyMuPDF
             doc = fitz.open(str(pdf_path))
-            
-            # Limit to 50 pages as specified
-            page_count = min(len(doc), 50)
-            logger.info(f"Processing {page_count} pages")
-            
-            # Extract all text blocks with formatting information
-            text_blocks = self._extract_text_blocks(doc, page_count)
-            
-            # Extract title
-            title = self.title_extractor.extract_title(doc, text_blocks)
-            
-            # Detect headings
-            headings = self.heading_detector.detect_headings(text_blocks)
-            
-            # Format output
-            result = self.output_formatter.format_output(title, headings)
-            
+        
+        deadline = None
+        if self.time_budget is not None:
+            # Any length, stopping at the first page boundary past the budget
+            deadline = time.monotonic() + self.time_budget
+            page_count = len(doc)
+        else:
+            page_count = min(len(doc), self.max_pages)
+        
+        # The title needs at most page 1, so it is resolved before anything else is read
+        with metrics.stage("extract_title"):
+            title, first_page_blocks = self._resolve_title(doc)
+        
+        if self.title_only:
+            metrics.count("pages", 0 if first_page_blocks is None else 1)
+            with metrics.stage("format_output"):
+                result = self.output_formatter.format_output(title, [])
             doc.close()
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
             return result
+        
+        logger.info(f"Processing {page_count} pages")
+        
+        # Plausible bookmarks replace span extraction and heading detection
+        headings = None
+        if self.toc_extractor is not None:
+            with metrics.stage("read_toc"):
+                headings = self.toc_extractor.extract_headings(
+                    doc, page_count, self.heading_detector.max_level
+                )
+        
+        if headings is not None:
+            metrics.count("toc_outlines")
+            pages_processed = page_count
+        elif self.streaming:
+            headings, pages_processed = self._process_streaming(doc, page_count, first_page_blocks, deadline)
+        else:
+            if deadline is not None:
+                # Statistics are accumulated page by page alongside the spans
+                text_blocks, doc_stats, pages_processed = self._extract_until(
+                    doc, page_count, deadline, first_page_blocks
+                )
+            else:
+                # Extract all text blocks with formatting information; statistics
+                # are accumulated as each part arrives
+                doc_stats = DocumentStatistics()
+                with metrics.stage("extract_text_blocks"):
+                    text_blocks = self._extract_text_blocks(doc, page_count, first_page_blocks, doc_stats)
+                pages_processed = page_count
+            metrics.count("spans", len(text_blocks))
             
-        except Exception as e:
-            logger.error(f"Error processing PDF: {str(e)}")
-            raise
+            # Detect headings
+            headings = self.heading_detector.detect_headings(text_blocks, doc_stats)
+        
+        metrics.count("pages", pages_processed)
+        
+        coverage = None
+        if deadline is not None:
+            coverage = {"pages_processed": pages_processed, "page_count": page_count}
+            if pages_processed < page_count:
+                logger.warning(f"Time budget exhausted after {pages_processed} of {page_count} pages")
+        
+        # Format output
+        with metrics.stage("format_output"):
+            result = self.output_formatter.format_output(title, headings, coverage)
+        metrics.count("headings", len(result["outline"]))
+        
+        doc.close()
+        
+        # Partial results depend on timing and are never cached
+        if cache_key is not None and pages_processed == page_count:
+            self.cache.put(cache_key, result)
+        
+        return result
+    
+    def _resolve_title(self, doc):
+        """
+        Resolve the title from metadata, or else from page 1 alone
+        
+        Returns:
+            tuple: (title, SpanTable of page 1, or None when metadata sufficed
+                and no page was read)
+        """
+        title = self.title_extractor.title_from_metadata(doc)
+        if title is not None:
+            return title, None
+        
+        first_page_blocks = extract_page_range(
+            doc, 0, min(len(doc), 1), self.extraction_backend, self.merge_lines
+        )
+        return self.title_extractor.title_from_content(doc, first_page_blocks), first_page_blocks
     
-    def _extract_text_blocks(self, doc, page_count):
-        """Extract text blocks with formatting information from all pages"""
-        text_blocks = []
+    def _process_streaming(self, doc, page_count, first_page_blocks=None, deadline=None):
+        """
+        Detect headings holding only one page of spans at a time
+        
+        Pass one accumulates document statistics; pass two re-reads pages
+        to score headings. With a deadline, pass one stops early and pass
+        two covers the same pages.
+        
+        Returns:
+            tuple: (headings, number of pages read)
+        """
+        doc_stats = DocumentStatistics()
+        pages_processed = 0
         
-        for page_num in range(page_count):
-            page = doc[page_num]
+        for page_blocks in self._iter_page_blocks(doc, page_count, first_page_blocks):
+            doc_stats.add_blocks(page_blocks)
+            pages_processed += 1
             
-            # Get text blocks with formatting
-            blocks = page.get_text("dict")
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        
+        logger.info(f"Streamed {doc_stats.count} text blocks")
+        self.instrumentation.count("spans", doc_stats.count)
+        
+        headings = self.heading_detector.detect_headings_streaming(
+            self._iter_page_blocks(doc, pages_processed, first_page_blocks), doc_stats
+        )
+        
+        return headings, pages_processed
+    
+    def _extract_until(self, doc, page_count, deadline, first_page_blocks=None):
+        """
+        Extract pages in order until the deadline passes
+        
+        Returns:
+            tuple: (SpanTable, DocumentStatistics, number of pages read)
+        """
+        text_blocks = SpanTable()
+        doc_stats = DocumentStatistics()
+        pages_processed = 0
+        
+        for page_blocks in self._iter_page_blocks(doc, page_count, first_page_blocks):
+            text_blocks.extend(page_blocks)
+            doc_stats.add_blocks(page_blocks)
+            pages_processed += 1
             
-            for block in blocks.get("blocks", []):
-                if "lines" not in block:
-                    continue
-                    
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        if not span["text"].strip():
-                            continue
-                            
-                        text_block = {
-                            "text": span["text"].strip(),
-                            "page": page_num + 1,
-                            "bbox": span["bbox"],  # (x0, y0, x1, y1)
-                            "font": span["font"],
-                            "size": span["size"],
-                            "flags": span["flags"],  # Bold, italic, etc.
-                            "x0": span["bbox"][0],
-                            "y0": span["bbox"][1],
-                            "x1": span["bbox"][2],
-                            "y1": span["bbox"][3],
-                            "width": span["bbox"][2] - span["bbox"][0],
-                            "height": span["bbox"][3] - span["bbox"][1]
-                        }
-                        
-                        # Calculate additional properties
-                        text_block["is_bold"] = bool(span["flags"] & 2**4)
-                        text_block["is_italic"] = bool(span["flags"] & 2**1)
-                        text_block["line_height"] = text_block["height"]
-                        
-                        text_blocks.append(text_block)
+            # The page just read is always kept, so statistics match the spans
+            if time.monotonic() >= deadline:
+                break
+        
+        logger.info(f"Extracted {len(text_blocks)} text blocks")
+        return text_blocks, doc_stats, pages_processed
+    
+    def _iter_page_blocks(self, doc, page_count, first_page_blocks=None):
+        """Yield a SpanTable for each page in order, reusing page 1 if already extracted"""
+        start = 0
+        if first_page_blocks is not None and page_count > 0:
+            yield first_page_blocks
+            start = 1
+        
+        for page_num in range(start, page_count):
+            with self.instrumentation.stage("extract_text_blocks"):
+                page_blocks = extract_page_range(
+                    doc, page_num, page_num + 1, self.extraction_backend, self.merge_lines
+                )
+            yield page_blocks
+    
+    def _extract_text_blocks(self, doc, page_count, first_page_blocks=None, doc_stats=None):
+        """
+        Extract text blocks with formatting information from all pages
+        
+        Args:
+            doc: Open PyMuPDF document
+            page_count: Number of leading pages to extract
+            first_page_blocks: Page 1 spans if already extracted
+            doc_stats: DocumentStatistics fed with every extracted span
+        """
+        # Page 1 may already have been read for the title
+        start = 1 if first_page_blocks is not None and page_count > 0 else 0
+        if start and doc_stats is not None:
+            doc_stats.add_blocks(first_page_blocks)
+        
+        # Workers reopen the document by path, so in-memory documents stay serial
+        if (self.page_workers > 1 and page_count - start >= self.parallel_min_pages
+                and doc.name):
+            text_blocks = self._extract_text_blocks_parallel(doc.name, start, page_count, doc_stats)
+        else:
+            text_blocks = extract_page_range(
+                doc, start, page_count, self.extraction_backend, self.merge_lines
+            )
+            if doc_stats is not None:
+                doc_stats.add_blocks(text_blocks)
+        
+        if start:
+            first_page_blocks.extend(text_blocks)
+            text_blocks = first_page_blocks
         
         logger.info(f"Extracted {len(text_blocks)} text blocks")
-        return text_blocks
\ No newline at end of file
+        return text_blocks
+    
+    def _extract_text_blocks_parallel(self, pdf_path, start, end, doc_stats=None):
+        """Split the page range across worker processes and merge in page order"""
+        if self._page_executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._page_executor = ProcessPoolExecutor(max_workers=self.page_workers)
+        
+        # Contiguous page slices, one per worker
+        page_count = end - start
+        slice_count = min(self.page_workers, page_count)
+        bounds = [start + page_count * i // slice_count for i in range(slice_count + 1)]
+        tasks = [(pdf_path, bounds[i], bounds[i + 1], self.extraction_backend, self.merge_lines)
+                 for i in range(slice_count)]
+        
+        text_blocks = SpanTable()
+        for part in self._page_executor.map(_extract_page_slice, tasks):
+            # Later slices are still being extracted while this one is counted
+            if doc_stats is not None:
+                doc_stats.add_blocks(part)
+            text_blocks.extend(part)
+        
+        return text_blocks
+
+
+def extract_page_range(doc, start, end, backend="lean", merge_lines=False):
+    """
+    Extract spans for pages [start, end) of an open document into a SpanTable
+    
+    With merge_lines, each run of spans sharing a baseline becomes one row.
+    """
+    import fitz  # PyMuPDF
+    
+    if backend == "lean":
+        # Image blocks carry their pixel data, copied into Python and then skipped
+        flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+    elif backend == "dict":
+        flags = None
+    else:
+        raise ValueError(f"Unknown extraction backend: {backend}")
+    
+    text_blocks = SpanTable()
+    
+    for page_num in range(start, end):
+        page = doc[page_num]
+        
+        # Get text blocks with formatting
+        blocks = page.get_text("dict", flags=flags)
+        
+        for block in blocks.get("blocks", []):
+            if "lines" not in block:
+                continue
+                
+            for line in block["lines"]:
+                spans = _merge_line_spans(line["spans"]) if merge_lines else line["spans"]
+                for span in spans:
+                    text = span["text"].strip()
+                    if not text:
+                        continue
+                    
+                    # Geometry, bold/italic and sizes are derived from
+                    # bbox and flags by the table's row view
+                    text_blocks.append(
+                        text,
+                        page_num + 1,
+                        span["bbox"],  # (x0, y0, x1, y1)
+                        span["font"],
+                        span["size"],
+                        span["flags"]  # Bold, italic, etc.
+                    )
+    
+    return text_blocks
+
+
+def _merge_line_spans(spans, baseline_tolerance=1.0):
+    """
+    Merge adjacent spans of a PyMuPDF line whose baselines agree
+    
+    Superscripts and subscripts sit on another baseline and stay separate.
+    """
+    merged = []
+    run = []
+    
+    for span in spans:
+        if run and abs(span["origin"][1] - run[-1]["origin"][1]) > baseline_tolerance:
+            merged.append(_combine_spans(run))
+            run = []
+        run.append(span)
+    
+    if run:
+        merged.append(_combine_spans(run))
+    return merged
+
+
+def _combine_spans(run):
+    """One span covering a run, styled by the font, size and flags with the most characters"""
+    if len(run) == 1:
+        return run[0]
+    
+    parts = [run[0]["text"]]
+    for previous, span in zip(run, run[1:]):
+        # Positioned words may have no space span between them
+        gap = span["bbox"][0] - previous["bbox"][2]
+        if (gap > 0.2 * min(previous["size"], span["size"])
+                and not parts[-1][-1:].isspace() and not span["text"][:1].isspace()):
+            parts.append(" ")
+        parts.append(span["text"])
+    
+    # Ties go to the earlier style; whitespace-only spans carry no weight
+    weights = Counter()
+    for span in run:
+        weights[(span["font"], span["size"], span["flags"])] += len(span["text"].strip())
+    (font, size, flags), _ = weights.most_common(1)[0]
+    
+    # Span texts carry their own padding ("  words"); collapse it to single spaces
+    return {
+        "text": " ".join("".join(parts).split()),
+        "bbox": (
+            min(span["bbox"][0] for span in run),
+            min(span["bbox"][1] for span in run),
+            max(span["bbox"][2] for span in run),
+            max(span["bbox"][3] for span in run),
+        ),
+        "font": font,
+        "size": size,
+        "flags": flags,
+    }
+
+
+def _extract_page_slice(task):
+    """Worker entry point: open a private document handle and extract a page slice"""
+    import fitz  # PyMuPDF
+    
+    pdf_path, start, end, backend, merge_lines = task
+    doc = fitz.open(pdf_path)
+    try:
+        return extract_page_range(doc, start, end, backend, merge_lines)
+    finally:
+        doc.close()
@@ -0,0 +1,145 @@
+"""
+Result Cache - On-disk cache of extraction results keyed by PDF content
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Modules whose source determines the extraction output
+FINGERPRINT_MODULES = [
+    "pdf_processor",
+    "title_extractor",
+    "heading_detector",
+    "toc_extractor",
+    "output_formatter",
+    "page_index",
+    "span_table",
+    "patterns",
+    "doc_stats",
+]
+
+def content_digest(pdf_path):
+    """Return a sha256 hash object fed with the file's bytes"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest
+
+
+class ResultCache:
+    """Size-bounded LRU cache of process_pdf results stored as JSON files"""
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024, config=None):
+        """
+        Args:
+            cache_dir: Directory holding cache entries
+            max_bytes: Total size of entries kept before evicting least recently used
+            config: Extractor settings that affect output, folded into every key
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.fingerprint = self._code_fingerprint(config or {})
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, pdf_path):
+        """Return the cache key for a PDF: its content hash plus the code fingerprint"""
+        digest = content_digest(pdf_path)
+        digest.update(self.fingerprint.encode("ascii"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached result for a key, or None on a miss"""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            logger.info(f"Cache miss (hits={self.hits}, misses={self.misses})")
+            return None
+
+        # Refresh access time for LRU ordering
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+        self.hits += 1
+        logger.info(f"Cache hit (hits={self.hits}, misses={self.misses})")
+        return result
+
+    def put(self, key, result):
+        """Store a result atomically, then evict old entries over the size limit"""
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError as e:
+            # A failed cache write never fails the extraction itself
+            logger.warning(f"Could not write cache entry: {e}")
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        self._evict()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for entry in self.cache_dir.glob("*.json"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+        logger.info(f"Cache evicted entries (evictions={self.evictions})")
+
+    def _code_fingerprint(self, config):
+        """Hash the pipeline source files and output-affecting config"""
+        digest = hashlib.sha256()
+        for name in FINGERPRINT_MODULES:
+            spec = importlib.util.find_spec(name)
+            source_file = spec.origin if spec else None
+            if source_file:
+                with open(source_file, "rb") as f:
+                    digest.update(f.read())
+            digest.update(name.encode("utf-8"))
+        digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
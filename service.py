@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Extraction Service - Local asyncio HTTP server backed by a warm pool of PDFProcessor workers
+
+Endpoints:
+    POST /extract   PDF bytes (Content-Type: application/pdf) or JSON {"path": "..."}
+    GET  /health    Worker count, queue depth and request totals
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from pathlib import Path
+
+from json_writer import dumps
+
+logger = logging.getLogger(__name__)
+
+# Per-process processor used by pool workers
+_worker_processor = None
+
+def _init_worker(options):
+    """Create the processor held by each pool worker; PyMuPDF loads once per worker"""
+    global _worker_processor
+    from pdf_processor import PDFProcessor
+
+    _worker_processor = PDFProcessor(**options)
+
+def _warm_up():
+    """No-op task that makes the pool start a worker and run its initializer"""
+    return os.getpid()
+
+def _extract(pdf_path):
+    """Pool entry point: process one file with the worker's processor"""
+    return _worker_processor.process_pdf(pdf_path)
+
+
+class HTTPError(Exception):
+    """Request failure answered with an HTTP status and a JSON error body"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class ExtractionService:
+    """HTTP front end that queues extraction requests onto a process pool"""
+
+    def __init__(self, workers=2, max_queue=8, timeout=30.0, max_upload_bytes=100 * 1024 * 1024,
+                 path_roots=("/app/input",), spool_dir=None, processor_options=None):
+        """
+        Args:
+            workers: Worker processes, each holding a warm PDFProcessor
+            max_queue: Requests allowed to wait for a worker before answering 503
+            timeout: Seconds allowed per request, from reading it to the result
+            max_upload_bytes: Largest accepted request body
+            path_roots: Directories that {"path": ...} requests may read from
+            spool_dir: Directory for uploaded PDFs while they are processed
+            processor_options: PDFProcessor keyword arguments for the workers
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_upload_bytes = max_upload_bytes
+        self.path_roots = [Path(root).resolve() for root in path_roots]
+        self.spool_dir = spool_dir
+        self.processor_options = processor_options or {}
+
+        self._executor = None
+        self._server = None
+        self._pool_lock = asyncio.Lock()
+
+        # Jobs submitted to the pool and not yet finished, including timed-out ones
+        self.in_flight = 0
+        self.totals = {"ok": 0, "error": 0, "rejected": 0, "timeout": 0}
+
+    @property
+    def queue_depth(self):
+        """Jobs waiting for a free worker"""
+        return max(0, self.in_flight - self.workers)
+
+    async def start(self, host="127.0.0.1", port=8000):
+        """Warm up the worker pool and start listening; returns the bound port"""
+        self._executor = await self._start_pool()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Serving on {host}:{port} with {self.workers} workers")
+        return port
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """Stop accepting connections and shut down the pool"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _start_pool(self):
+        """Start the pool and wait until every worker has loaded its processor"""
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.processor_options,)
+        )
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)))
+        logger.info(f"Warmed {len(set(pids))} worker processes")
+        return executor
+
+    async def _handle_connection(self, reader, writer):
+        """Serve one request per connection"""
+        start_time = time.perf_counter()
+        try:
+            status, body, headers = await self._respond(reader)
+        except Exception as e:
+            logger.exception(f"Unhandled error: {e}")
+            status, body, headers = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, {}
+
+        payload = dumps(body, compact=True)
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(payload)}",
+            f"X-Queue-Depth: {self.queue_depth}",
+            "Connection: close",
+        ]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+        logger.info(f"{status.value} in {time.perf_counter() - start_time:.3f}s "
+                    f"(in flight: {self.in_flight})")
+
+    async def _respond(self, reader):
+        """Return (status, JSON body, extra headers) for one request"""
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        try:
+            method, target, headers, body = await asyncio.wait_for(self._read_request(reader), self.timeout)
+
+            if method == "GET" and target == "/health":
+                return HTTPStatus.OK, self._health(), {}
+            if target != "/extract":
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {target}")
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST", {"Allow": "POST"})
+
+            remaining = deadline - asyncio.get_running_loop().time()
+            result = await self._extract(headers.get("content-type", ""), body, remaining)
+            self.totals["ok"] += 1
+            return HTTPStatus.OK, result, {}
+
+        except asyncio.TimeoutError:
+            self.totals["timeout"] += 1
+            return HTTPStatus.GATEWAY_TIMEOUT, {"error": f"Request exceeded {self.timeout}s"}, {}
+        except HTTPError as e:
+            if e.status == HTTPStatus.SERVICE_UNAVAILABLE:
+                self.totals["rejected"] += 1
+            return e.status, {"error": str(e)}, e.headers
+
+    async def _read_request(self, reader):
+        """Parse the request line, headers and Content-Length body"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers too large")
+        except asyncio.IncompleteReadError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Incomplete request")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        if method == "POST":
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Chunked bodies are not supported")
+            try:
+                length = int(headers["content-length"])
+            except (KeyError, ValueError):
+                raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Content-Length required")
+            if length > self.max_upload_bytes:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                f"Body over {self.max_upload_bytes} bytes")
+            try:
+                body = await reader.readexactly(length)
+            except asyncio.IncompleteReadError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Incomplete body")
+
+        return method, target.split("?", 1)[0], headers, body
+
+    async def _extract(self, content_type, body, timeout):
+        """Run one extraction on the pool, rejecting it when the queue is full"""
+        # Backpressure: jobs still running after a timeout keep their slot
+        if self.in_flight >= self.workers + self.max_queue:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Extraction queue is full",
+                            {"Retry-After": "1"})
+
+        if content_type.split(";")[0].strip() == "application/json":
+            pdf_path, spooled = self._resolve_path(body), False
+        else:
+            pdf_path, spooled = self._spool_upload(body), True
+
+        try:
+            future, executor = await self._submit(pdf_path)
+        except BaseException:
+            if spooled:
+                pdf_path.unlink(missing_ok=True)
+            raise
+
+        self.in_flight += 1
+
+        def finished(_):
+            self.in_flight -= 1
+            if spooled:
+                pdf_path.unlink(missing_ok=True)
+
+        future.add_done_callback(finished)
+
+        try:
+            # Shielded, so a timed-out job finishes in the background and frees its slot then
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # Answered with 504 by _respond
+            raise
+        except BrokenProcessPool:
+            await self._replace_pool(executor)
+            raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, "Worker process died")
+        except Exception as e:
+            self.totals["error"] += 1
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, f"Could not process PDF: {e}")
+
+    def _resolve_path(self, body):
+        """Validate a {"path": ...} request against the allowed roots"""
+        try:
+            path = Path(json.loads(body)["path"]).resolve()
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected a JSON body {"path": "..."}')
+
+        if not any(path.is_relative_to(root) for root in self.path_roots):
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Path is outside the allowed directories")
+        if not path.is_file():
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No such file: {path}")
+        return path
+
+    def _spool_upload(self, body):
+        """Write uploaded PDF bytes to a temporary file the workers can open"""
+        if not body.startswith(b"%PDF"):
+            raise HTTPError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Body is not a PDF")
+
+        fd, path = tempfile.mkstemp(dir=self.spool_dir, suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        return Path(path)
+
+    async def _submit(self, pdf_path):
+        """Queue a file on the pool, restarting the pool once if it is broken"""
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return loop.run_in_executor(executor, _extract, str(pdf_path)), executor
+        except BrokenProcessPool:
+            await self._replace_pool(executor)
+            executor = self._executor
+            return loop.run_in_executor(executor, _extract, str(pdf_path)), executor
+
+    async def _replace_pool(self, broken):
+        """Start a fresh pool after a worker crashed, once per broken pool"""
+        async with self._pool_lock:
+            if self._executor is not broken:
+                return
+            logger.error("Worker pool broke, restarting it")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = await self._start_pool()
+
+    def _health(self):
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "requests": dict(self.totals),
+        }
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Serve PDF outline extraction over local HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind (default: 8000)")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes (default: 2)")
+    parser.add_argument(
+        "--max-queue", type=int, default=8,
+        help="Requests allowed to wait for a worker before answering 503 (default: 8)"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=30.0,
+        help="Seconds allowed per request before answering 504 (default: 30)"
+    )
+    parser.add_argument(
+        "--max-upload-mb", type=int, default=100,
+        help="Largest accepted upload in MB (default: 100)"
+    )
+    parser.add_argument(
+        "--path-root", action="append", default=None,
+        help="Directory that path requests may read from; repeatable (default: /app/input)"
+    )
+    parser.add_argument(
+        "--cache-dir", default=None,
+        help="Directory for the content-hash result cache (disabled by default)"
+    )
+    return parser.parse_args(argv)
+
+async def serve(args):
+    service = ExtractionService(
+        workers=args.workers,
+        max_queue=args.max_queue,
+        timeout=args.timeout,
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+        path_roots=args.path_root or ["/app/input"],
+        processor_options={"cache_dir": args.cache_dir},
+    )
+    await service.start(args.host, args.port)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.stop()
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
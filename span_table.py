@@ -0,0 +1,172 @@
+"""
+Span Table - Compact columnar storage for extracted text spans
+"""
+
+from array import array
+
+
+class SpanTable:
+    """Stores text spans as parallel columns instead of one dict per span"""
+
+    def __init__(self):
+        self.text = []
+        self.page = array("i")
+        self.x0 = array("d")
+        self.y0 = array("d")
+        self.x1 = array("d")
+        self.y1 = array("d")
+        self.size = array("d")
+        self.flags = array("i")
+        self.font_ids = array("i")
+
+        # Interned font names, referenced by index from font_ids
+        self.fonts = []
+        self._font_lookup = {}
+
+        self._columns = {
+            "text": self.text,
+            "page": self.page,
+            "x0": self.x0,
+            "y0": self.y0,
+            "x1": self.x1,
+            "y1": self.y1,
+            "size": self.size,
+            "flags": self.flags,
+        }
+
+    def append(self, text, page, bbox, font, size, flags):
+        """
+        Add a span to the table
+
+        Args:
+            text: Stripped span text
+            page: 1-based page number
+            bbox: (x0, y0, x1, y1) bounding box
+            font: Font name
+            size: Font size in points
+            flags: PyMuPDF span flags
+        """
+        font_id = self._intern_font(font)
+
+        self.text.append(text)
+        self.page.append(page)
+        self.x0.append(bbox[0])
+        self.y0.append(bbox[1])
+        self.x1.append(bbox[2])
+        self.y1.append(bbox[3])
+        self.size.append(size)
+        self.flags.append(flags)
+        self.font_ids.append(font_id)
+
+    def extend(self, other):
+        """Append all spans from another table, remapping its font ids"""
+        font_map = [self._intern_font(font) for font in other.fonts]
+
+        self.text.extend(other.text)
+        self.page.extend(other.page)
+        self.x0.extend(other.x0)
+        self.y0.extend(other.y0)
+        self.x1.extend(other.x1)
+        self.y1.extend(other.y1)
+        self.size.extend(other.size)
+        self.flags.extend(other.flags)
+        self.font_ids.extend(font_map[font_id] for font_id in other.font_ids)
+
+    def _intern_font(self, font):
+        """Return the id of a font name, adding it on first use"""
+        font_id = self._font_lookup.get(font)
+        if font_id is None:
+            font_id = len(self.fonts)
+            self.fonts.append(font)
+            self._font_lookup[font] = font_id
+        return font_id
+
+    def __len__(self):
+        return len(self.text)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [SpanRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("span index out of range")
+        return SpanRow(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield SpanRow(self, i)
+
+
+def _bbox(table, i):
+    return (table.x0[i], table.y0[i], table.x1[i], table.y1[i])
+
+
+def _height(table, i):
+    return table.y1[i] - table.y0[i]
+
+
+# Fields computed from the stored columns on access
+_DERIVED_FIELDS = {
+    "bbox": _bbox,
+    "font": lambda table, i: table.fonts[table.font_ids[i]],
+    "width": lambda table, i: table.x1[i] - table.x0[i],
+    "height": _height,
+    "line_height": _height,
+    "is_bold": lambda table, i: bool(table.flags[i] & 2**4),
+    "is_italic": lambda table, i: bool(table.flags[i] & 2**1),
+}
+
+# Stored fields that fully determine a span, used for equality
+_IDENTITY_FIELDS = ("text", "page", "bbox", "font", "size", "flags")
+
+
+class SpanRow:
+    """Read-only mapping view of a single span in a SpanTable"""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        column = self._table._columns.get(key)
+        if column is not None:
+            return column[self._index]
+
+        derived = _DERIVED_FIELDS.get(key)
+        if derived is None:
+            raise KeyError(key)
+        return derived(self._table, self._index)
+
+    def get(self, key, default=None):
+        """Return field value, or default if the field does not exist"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """Return all field names available on the row"""
+        return list(self._table._columns) + list(_DERIVED_FIELDS)
+
+    def to_dict(self):
+        """Return the row as a plain dict"""
+        return {key: self[key] for key in self.keys()}
+
+    def _identity(self):
+        return tuple(self[key] for key in _IDENTITY_FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, SpanRow):
+            if self._table is other._table and self._index == other._index:
+                return True
+            return self._identity() == other._identity()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._identity())
+
+    def __repr__(self):
+        return f"SpanRow({self.to_dict()!r})"
@@ -0,0 +1,80 @@
+"""
+Startup Profile - Per-module import timing for diagnosing cold-start cost
+"""
+
+import sys
+import time
+
+
+class _TimedLoader:
+    """Loader wrapper that reports how long executing a module took"""
+
+    def __init__(self, loader, name, profiler):
+        self._loader = loader
+        self._name = name
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        profiler = self._profiler
+        profiler._child_seconds.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = profiler._child_seconds.pop()
+            if profiler._child_seconds:
+                profiler._child_seconds[-1] += elapsed
+            else:
+                profiler.total_seconds += elapsed
+            profiler.timings[self._name] = (elapsed, elapsed - children)
+
+
+class ImportProfiler:
+    """Meta path hook timing every import made while installed, like -X importtime"""
+
+    def __init__(self):
+        # Module name -> (cumulative seconds, self seconds)
+        self.timings = {}
+        self.total_seconds = 0.0
+        self._child_seconds = []
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        """Find the module with the remaining finders and wrap its loader"""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, fullname, self)
+        return spec
+
+    def report(self, limit=15):
+        """Log the total and the modules with the most self time"""
+        # Imported here rather than at the top, so the profiler can time logging itself
+        import logging
+        logger = logging.getLogger(__name__)
+
+        logger.info(f"Imports after startup: {self.total_seconds * 1000:.1f}ms "
+                    f"across {len(self.timings)} modules")
+        ranked = sorted(self.timings.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (cumulative, own) in ranked[:limit]:
+            logger.info(f"  {own * 1000:8.1f}ms self {cumulative * 1000:8.1f}ms cumulative  {name}")
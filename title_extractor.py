@@ -2,9 +2,12 @@
 Title Extractor - Logic for identifying document titles
 """
 
+import bisect
 import logging
 import re
 from collections import Counter
+from patterns import match_title_noise
+from span_table import SpanTable
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +25,35 @@ class TitleExtractor:
         Returns:
             str: Extracted title
         """
-        # Strategy 1: Try document metadata
+        title = self.title_from_metadata(doc)
+        if title is None:
+            title = self.title_from_content(doc, text_blocks)
+        return title
+    
+    def title_from_metadata(self, doc):
+        """
+        Strategy 1: the document metadata title, which needs no page content
+        
+        Returns:
+            str: Metadata title, or None if it is missing or too short
+        """
         title = self._extract_from_metadata(doc)
         if title and len(title.strip()) > 0:
             logger.info(f"Title extracted from metadata: {title}")
             return title.strip()
+        return None
+    
+    def title_from_content(self, doc, text_blocks):
+        """
+        Strategies 2 and 3: first page content, then the fallback title
+        
+        Only page 1 blocks are used, so text_blocks may hold just that page.
         
+        Returns:
+            str: Extracted title
+        """
         # Strategy 2: Find title from first page content
-        title = self._extract_from_content(text_blocks)
+        title = self._extract_from_content(text_blocks, self._first_page_rect(doc))
         if title:
             logger.info(f"Title extracted from content: {title}")
             return title
@@ -50,36 +74,55 @@ class TitleExtractor:
             logger.debug(f"Could not extract metadata title: {e}")
         return None
     
-    def _extract_from_content(self, text_blocks):
+    def _first_page_rect(self, doc):
+        """Return the first page's rectangle, or None if it is unavailable"""
+        try:
+            if doc is not None and len(doc) > 0:
+                return doc[0].rect
+        except Exception as e:
+            logger.debug(f"Could not read first page geometry: {e}")
+        return None
+    
+    def _extract_from_content(self, text_blocks, page_rect=None):
         """Extract title from document content using heuristics"""
         if not text_blocks:
             return None
         
-        # Filter first page blocks
-        first_page_blocks = [b for b in text_blocks if b["page"] == 1]
+        # Filter first page blocks; a SpanTable is in page order, so page 1 is a prefix
+        if isinstance(text_blocks, SpanTable):
+            first_page_blocks = text_blocks[:bisect.bisect_right(text_blocks.page, 1)]
+        else:
+            first_page_blocks = [b for b in text_blocks if b["page"] == 1]
         if not first_page_blocks:
             return None
         
-        # Find potential titles using multiple criteria
-        candidates = []
-        
         # Get font size statistics
         font_sizes = [b["size"] for b in first_page_blocks]
-        if not font_sizes:
-            return None
-            
         avg_size = sum(font_sizes) / len(font_sizes)
         max_size = max(font_sizes)
         
+        # Page geometry comes from the page itself, falling back to text extents
+        if page_rect is not None:
+            page_width = page_rect.width
+            page_height = page_rect.height
+        else:
+            page_width = max(b["x1"] for b in first_page_blocks)
+            page_height = max(b["y1"] for b in first_page_blocks)
+        
         # Look for large, bold, centered text in upper part of first page
-        page_height = max(b["y1"] for b in first_page_blocks)
         upper_threshold = page_height * 0.3  # Upper 30% of page
+        center = page_width / 2
+        center_tolerance = page_width * 0.2
+        
+        # Best candidate so far, ranked by score (descending) then position (ascending)
+        best_key = None
+        best_text = None
         
         for block in first_page_blocks:
-            # Skip very small text or common patterns
-            if (len(block["text"]) < 3 or 
-                len(block["text"]) > 200 or
-                self._is_common_pattern(block["text"])):
+            text = block["text"]
+            
+            # Skip very small text
+            if len(text) < 3 or len(text) > 200:
                 continue
             
             score = 0
@@ -95,32 +138,38 @@ class TitleExtractor:
                 score += 2
             
             # Position in upper part of page
-            if block["y0"] <= upper_threshold:
+            y0 = block["y0"]
+            if y0 <= upper_threshold:
                 score += 2
             
             # Centered text (approximately)
-            page_width = max(b["x1"] for b in first_page_blocks)
-            center = page_width / 2
             text_center = (block["x0"] + block["x1"]) / 2
-            if abs(text_center - center) < page_width * 0.2:
+            if abs(text_center - center) < center_tolerance:
                 score += 1
             
             # Avoid very long lines (likely paragraphs)
-            if len(block["text"]) > 100:
+            if len(text) > 100:
                 score -= 1
             
             # Prefer title case or all caps
-            if (block["text"].istitle() or 
-                (block["text"].isupper() and len(block["text"]) > 5)):
+            if text.istitle() or (text.isupper() and len(text) > 5):
                 score += 1
             
-            if score > 0:
-                candidates.append((score, block["text"], block["y0"]))
+            if score <= 0:
+                continue
+            
+            # Earlier blocks win ties; pattern checks only run for a new best
+            key = (-score, y0)
+            if best_key is not None and key >= best_key:
+                continue
+            if self._is_common_pattern(text):
+                continue
+            
+            best_key = key
+            best_text = text
         
-        if candidates:
-            # Sort by score (descending) and position (ascending)
-            candidates.sort(key=lambda x: (-x[0], x[2]))
-            title = candidates[0][1].strip()
+        if best_text is not None:
+            title = best_text.strip()
             
             # Clean up title
             title = re.sub(r'\s+', ' ', title)
@@ -133,19 +182,4 @@ class TitleExtractor:
     
     def _is_common_pattern(self, text):
         """Check if text matches common non-title patterns"""
-        patterns = [
-            r'^\d+$',  # Just numbers
-            r'^page\s+\d+',  # Page numbers
-            r'^chapter\s+\d+',  # Chapter numbers
-            r'^fig\w*\s+\d+',  # Figure references
-            r'^table\s+\d+',  # Table references
-            r'^\w{1,3}\s*$',  # Very short text
-            r'^[^\w]*$',  # Only punctuation
-        ]
-        
-        text_lower = text.lower().strip()
-        for pattern in patterns:
-            if re.match(pattern, text_lower):
-                return True
-        
-        return False
\ No newline at end of file
+        return match_title_noise(text) is not None
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+TOC Extractor - Reads headings from a PDF's embedded bookmarks when they are trustworthy
+"""
+
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+class TocExtractor:
+    """Maps the bookmark tree (doc.get_toc()) to outline headings"""
+
+    def __init__(self, spot_checks=3, min_entries=2, min_valid_ratio=0.9, min_word_coverage=0.8):
+        """
+        Args:
+            spot_checks: Bookmarks whose text is looked up on their target page
+                before the tree is trusted (0 skips the check)
+            min_entries: Fewest usable bookmarks for the tree to replace detection
+            min_valid_ratio: Share of bookmarks that must have text and a page in range
+            min_word_coverage: Share of a bookmark's words that must appear on its page
+        """
+        self.spot_checks = spot_checks
+        self.min_entries = min_entries
+        self.min_valid_ratio = min_valid_ratio
+        self.min_word_coverage = min_word_coverage
+
+    def extract_headings(self, doc, page_count, max_level=3):
+        """
+        Build headings from the bookmark tree if it is present and plausible
+
+        Args:
+            doc: PyMuPDF document object
+            page_count: Pages covered by the outline; bookmarks past it are dropped
+            max_level: Deepest heading level; deeper bookmarks are dropped
+
+        Returns:
+            list: Headings with level, text and page, or None to fall back to detection
+        """
+        try:
+            toc = doc.get_toc(simple=True)
+        except Exception as e:
+            logger.debug(f"Could not read bookmarks: {e}")
+            return None
+
+        if not toc:
+            return None
+
+        entries = []
+        for level, text, page in toc:
+            text = " ".join(text.split())
+            if text and 1 <= page <= len(doc):
+                entries.append((level, text, page))
+
+        if len(entries) < self.min_entries or len(entries) < len(toc) * self.min_valid_ratio:
+            logger.info(f"Ignoring bookmarks: {len(entries)} of {len(toc)} usable")
+            return None
+
+        if not self._levels_consistent(entries):
+            logger.info("Ignoring bookmarks: levels skip a step")
+            return None
+
+        if not self._spot_check(doc, entries):
+            logger.info("Ignoring bookmarks: text not found on the target pages")
+            return None
+
+        headings = [
+            {"level": f"H{level}", "text": text, "page": page}
+            for level, text, page in entries
+            if level <= max_level and page <= page_count
+        ]
+
+        if not headings:
+            logger.info("Ignoring bookmarks: none within the page or level limit")
+            return None
+
+        logger.info(f"Using {len(headings)} headings from {len(toc)} bookmarks")
+        return headings
+
+    def _levels_consistent(self, entries):
+        """Whether the tree starts at level 1 and never descends more than one level at a time"""
+        previous = 0
+        for level, _, _ in entries:
+            if level > previous + 1:
+                return False
+            previous = level
+        return True
+
+    def _spot_check(self, doc, entries):
+        """Look for evenly spaced bookmarks' text on their target pages"""
+        if self.spot_checks <= 0:
+            return True
+
+        count = min(self.spot_checks, len(entries))
+        step = len(entries) / count
+
+        for i in range(count):
+            _, text, page = entries[int(i * step)]
+            if not self._text_on_page(text, doc[page - 1].get_text("text")):
+                logger.debug(f"Bookmark {text!r} not found on page {page}")
+                return False
+        return True
+
+    def _text_on_page(self, text, page_text):
+        """Whether the bookmark text, or most of its words, appear in the page text"""
+        text = " ".join(text.split()).casefold()
+        page_text = " ".join(page_text.split()).casefold()
+        if text in page_text:
+            return True
+
+        # Bookmarks often differ from the printed heading in punctuation or numbering
+        words = _WORD_PATTERN.findall(text)
+        if not words:
+            return False
+        page_words = set(_WORD_PATTERN.findall(page_text))
+        found = sum(1 for word in words if word in page_words)
+        return found / len(words) >= self.min_word_coverage
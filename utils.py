@@ -5,6 +5,7 @@ Utility functions for PDF processing
 import logging
 import re
 from pathlib import Path
+from doc_stats import DocumentStatistics
 
 logger = logging.getLogger(__name__)
 
@@ -54,16 +55,21 @@ def normalize_text(text):
     return text
 
 def detect_language(text_blocks):
-    """Simple language detection based on character patterns"""
-    if not text_blocks:
-        return "en"
+    """Simple language detection based on character patterns
     
-    # Combine first 1000 characters from text blocks
-    combined_text = ""
-    for block in text_blocks[:50]:  # First 50 blocks
-        combined_text += block.get("text", "") + " "
-        if len(combined_text) > 1000:
-            break
+    text_blocks may also be a DocumentStatistics, which keeps the same sample.
+    """
+    if isinstance(text_blocks, DocumentStatistics):
+        combined_text = "".join(text + " " for text in text_blocks.language_sample)
+    elif not text_blocks:
+        return "en"
+    else:
+        # Combine first 1000 characters from text blocks
+        combined_text = ""
+        for block in text_blocks[:50]:  # First 50 blocks
+            combined_text += block.get("text", "") + " "
+            if len(combined_text) > 1000:
+                break
     
     # Simple heuristic language detection
     if re.search(r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9faf]', combined_text):
@@ -80,7 +86,13 @@ def detect_language(text_blocks):
     return "en"  # Default to English
 
 def calculate_text_density(text_blocks, page_num):
-    """Calculate text density for a specific page"""
+    """Calculate text density for a specific page
+    
+    text_blocks may also be a DocumentStatistics, which answers without a scan.
+    """
+    if isinstance(text_blocks, DocumentStatistics):
+        return text_blocks.text_density(page_num)
+    
     page_blocks = [b for b in text_blocks if b["page"] == page_num]
     
     if not page_blocks:
@@ -0,0 +1,267 @@
+"""
+Watch Folder - Incremental processing of a directory of PDFs for daemon mode
+"""
+
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from json_writer import write_json
+from result_cache import content_digest
+
+logger = logging.getLogger(__name__)
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_MOVED_FROM = 0x00000040
+IN_Q_OVERFLOW = 0x00004000
+
+# struct inotify_event header: wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+def _load_libc_inotify():
+    """Return libc if it provides inotify (Linux), else None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not (hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch")):
+        return None
+    return libc
+
+
+class Manifest:
+    """Processed PDFs with the mtime, size and content hash they had when processed"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.files = {}
+        self._dirty = False
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)["files"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def is_current(self, name, stat):
+        """Whether the file is unchanged since it was recorded, judged by mtime and size"""
+        entry = self.files.get(name)
+        return (entry is not None and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size)
+
+    def has_content(self, name, sha256):
+        """Whether the recorded file had this content hash"""
+        entry = self.files.get(name)
+        return entry is not None and entry["sha256"] == sha256
+
+    def record(self, name, stat, sha256):
+        self.files[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+        self._dirty = True
+
+    def forget_missing(self, present_names):
+        """Drop entries for files no longer in the directory"""
+        for name in set(self.files) - set(present_names):
+            del self.files[name]
+            self._dirty = True
+
+    def save(self):
+        """Write the manifest atomically if it changed"""
+        if not self._dirty:
+            return
+        write_json(self.path, {"version": 1, "files": self.files})
+        self._dirty = False
+
+
+class PollingWatcher:
+    """Wakes up every interval; a file is complete once it is stable across two scans"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def wait(self, timeout, stop_event=None):
+        if stop_event is not None:
+            stop_event.wait(timeout)
+        else:
+            time.sleep(timeout)
+
+    def is_complete(self, name):
+        return False
+
+    def needs_stable_scans(self, name):
+        return True
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Wakes up on directory events; closed-after-write and moved-in files are complete
+
+    Files that were already present at startup or after a queue overflow may
+    have missed their events, so they fall back to the stable-across-scans rule
+    until an event is seen for them.
+    """
+
+    def __init__(self, directory, libc):
+        self.directory = directory
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MOVED_FROM
+        if libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+        self._complete = set()
+        self._untracked = self._list_pdfs()
+
+    def _list_pdfs(self):
+        return {path.name for path in Path(self.directory).glob("*.pdf")}
+
+    def wait(self, timeout, stop_event=None):
+        """
+        Block until events arrive or the timeout passes, then consume them
+
+        stop_event is checked by the caller between waits, so stopping takes
+        at most one timeout.
+        """
+        # The scan since the last wait looked at every file, so older marks are spent
+        self._complete.clear()
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return
+
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += name_len
+
+                if mask & IN_Q_OVERFLOW:
+                    # Lost events; files fall back to the stable-across-scans rule
+                    logger.warning("inotify queue overflowed")
+                    self._untracked = self._list_pdfs()
+                    continue
+
+                self._untracked.discard(name)
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    self._complete.add(name)
+
+    def is_complete(self, name):
+        """Whether the file was closed after writing or moved in since last asked"""
+        if name in self._complete:
+            self._complete.discard(name)
+            return True
+        return False
+
+    def needs_stable_scans(self, name):
+        """Whether the file may have changed without events, so completion must be inferred"""
+        return name in self._untracked
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(directory, use_inotify=True):
+    """inotify watcher where available, otherwise polling"""
+    libc = _load_libc_inotify() if use_inotify else None
+    if libc is not None:
+        try:
+            return InotifyWatcher(directory, libc)
+        except OSError as e:
+            logger.warning(f"inotify unavailable, polling instead: {e}")
+    return PollingWatcher(directory)
+
+
+def watch_folder(input_dir, manifest, handle, poll_interval=2.0, stop_event=None, use_inotify=True):
+    """
+    Process new and modified PDFs in input_dir until stop_event is set
+
+    A file is handled once it is complete: inotify reported it closed after
+    writing or moved in, or, when polling or for files whose events may have
+    been missed, its mtime and size were the same on two consecutive scans.
+    Files whose mtime or size changed but whose content
+    hash did not are only re-recorded.
+
+    Args:
+        input_dir: Directory to watch
+        manifest: Manifest of processed files, saved after every scan that changed it
+        handle: Called as handle(pdf_file, sha256) for each file to process
+        poll_interval: Longest wait between scans in seconds
+        stop_event: threading.Event that ends the loop (runs forever if None)
+        use_inotify: Use inotify when available instead of polling
+    """
+    input_dir = Path(input_dir)
+    watcher = create_watcher(input_dir, use_inotify)
+    logger.info(f"Watching {input_dir} with {type(watcher).__name__}")
+
+    # (mtime_ns, size) of changed files seen on the previous scan
+    pending = {}
+
+    try:
+        while stop_event is None or not stop_event.is_set():
+            present = []
+
+            for pdf_file in sorted(input_dir.glob("*.pdf")):
+                name = pdf_file.name
+                try:
+                    stat = pdf_file.stat()
+                except FileNotFoundError:
+                    continue
+                present.append(name)
+
+                if manifest.is_current(name, stat):
+                    pending.pop(name, None)
+                    continue
+
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if not watcher.is_complete(name) and (
+                        not watcher.needs_stable_scans(name) or pending.get(name) != signature):
+                    # Possibly still being written; look again next scan
+                    pending[name] = signature
+                    continue
+                pending.pop(name, None)
+
+                try:
+                    sha256 = content_digest(pdf_file).hexdigest()
+                except FileNotFoundError:
+                    continue
+
+                if not manifest.has_content(name, sha256):
+                    handle(pdf_file, sha256)
+                manifest.record(name, stat, sha256)
+
+            manifest.forget_missing(present)
+            manifest.save()
+            for name in set(pending) - set(present):
+                del pending[name]
+
+            watcher.wait(poll_interval, stop_event)
+    finally:
+        watcher.close()